@@ -2,26 +2,39 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from fastapi import FastAPI
+from dotenv import load_dotenv
+
+# Load .env once, before any module reads its settings at import time
+load_dotenv()
+
+import logging
+
+# Logging is configured here only; library modules just create their loggers
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+)
+
+from fastapi import FastAPI, Request
+from fastapi.exceptions import RequestValidationError
+from starlette.exceptions import HTTPException
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from modules.shared.db import init_db
+from modules.shared.db import init_db, close_db
+from modules.shared.response import error_response
 from modules.shared.seed import seed_data
 from modules.auth.router import router as auth_router
 from modules.incidents.router import router as incidents_router
+from modules.incidents.manager import drain_background_tasks as drain_incident_tasks
 from modules.alerts.router import router as alerts_router
+from modules.alerts.manager import ensure_firebase
 from modules.shared.schema import create_tables
 from modules.emergency.router import router as emergency_router
 from modules.map.router import router as map_router
 from modules.notifications.router import router as notifications_router
-import os
-from dotenv import load_dotenv
-from fastapi import HTTPException
-from modules.shared import utils
-from modules.shared.response import success_response
-
-load_dotenv()
+from modules.notifications.manager import start_role_cache_listener, stop_role_cache_listener
 
-app = FastAPI(title="Citizen Safety API")
+app = FastAPI(title="Citizen Safety API", default_response_class=ORJSONResponse)
 
 # CORS configuration
 app.add_middleware(
@@ -32,6 +45,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+logger = logging.getLogger(__name__)
+
+@app.exception_handler(HTTPException)
+async def http_exception_handler(request: Request, exc: HTTPException):
+    """
+    Render HTTPExceptions in the standard error envelope. Registered on Starlette's class so
+    routing 404/405s are covered as well as FastAPI's HTTPException subclass.
+    """
+    response = error_response(exc.detail, exc.status_code)
+    if exc.headers:
+        response.headers.update(exc.headers)
+    return response
+
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    """Render request validation failures (422) in the standard error envelope"""
+    message = "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in exc.errors()
+    )
+    return error_response(message or "Invalid request", 422)
+
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception):
+    """Log unexpected errors once and return a generic 500 without leaking details"""
+    logger.exception("Unhandled error on %s %s", request.method, request.url.path)
+    return error_response("Internal server error", 500)
+
 # Include routers
 app.include_router(auth_router, prefix="/api/auth")
 app.include_router(incidents_router, prefix="/api/incidents")
@@ -42,11 +82,36 @@ app.include_router(notifications_router, prefix="/api/notifications")
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database tables and seed data on startup"""
+    """Initialize database tables, seed data and Firebase on startup (runs once per process)"""
+    if getattr(app.state, "initialized", False):
+        return
+    app.state.initialized = True
     await init_db()
     await create_tables()
     await seed_data()
+    await start_role_cache_listener()
+    ensure_firebase()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Let in-flight notifications finish, then close the database pool"""
+    await drain_incident_tasks()
+    await stop_role_cache_listener()
+    await close_db()
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # WebSocket clients and alert fan-out live in process memory, so extra workers
+    # only see their own connections; keep a single worker unless that changes.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("UVICORN_WORKERS", "1")),
+        # Behind a load balancer or reverse proxy, set FORWARDED_ALLOW_IPS to its address(es) so
+        # request.client.host is the real client (the login rate limit is keyed on it)
+        proxy_headers=True,
+        forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+    )
\ No newline at end of file
@@ -3,88 +3,105 @@ from uuid import uuid4
 from datetime import datetime, timedelta
 from fastapi import Depends
 from .models import AlertTrigger, AlertResponse
+from .utils import alert_clients
 # --- Firebase Push Notification Integration ---
 import firebase_admin  # Firebase A
 from firebase_admin import credentials, messaging
 import os
 from fastapi import WebSocket
-from typing import Any
 import json
 
-# Initialize Firebase app (only once)
-if not firebase_admin._apps:
-    firebase_credentials_json = os.getenv("FIREBASE_CREDENTIALS")
-    if not firebase_credentials_json:
-        raise RuntimeError("FIREBASE_CREDENTIALS not set")
-
-    cred_dict = json.loads(firebase_credentials_json)
-    cred = credentials.Certificate(cred_dict)
-    firebase_admin.initialize_app(cred)
-
 from modules.shared.db import execute_query
-from modules.shared.response import success_response, error_response
+from modules.shared.response import success_response, error_response, json_default
 from modules.auth.manager import get_current_user
 
-import json
-import math
+import orjson
+import time
+import asyncio
 
 logger = logging.getLogger(__name__)
 
-connected_alert_clients: dict[WebSocket, dict[str, Any]] = {}
+# Explicit alert column list so list queries are stable against schema additions
+ALERT_COLS = "id, trigger_source, triggered_by, type, message, broadcast_type, location_lat, location_lon, radius_km, status, created_at, cooldown_until"
 
 
 def serialize_row(row):
-            d = dict(row)
-            for k, v in d.items():
-                if isinstance(v, datetime):
-                    d[k] = v.isoformat()
-            return d
-
-# Haversine formula for distance in km
-def haversine(lat1, lon1, lat2, lon2):
-    logger.debug(f"Calculating haversine distance: ({lat1}, {lon1}) <-> ({lat2}, {lon2})")
-    R = 6371  # Earth radius in km
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-    distance = R * c
-    logger.debug(f"Haversine distance result: {distance} km")
-    return distance
+    # Datetimes are left as-is; the orjson-backed responses encode them as ISO-8601
+    return dict(row)
+
+def ensure_firebase() -> bool:
+    """
+    Initialize the Firebase app on first use (only once).
+    Returns False when FIREBASE_CREDENTIALS is not configured.
+    """
+    if firebase_admin._apps:
+        return True
+    firebase_credentials_json = os.getenv("FIREBASE_CREDENTIALS")
+    if not firebase_credentials_json:
+        logger.error("FIREBASE_CREDENTIALS not set; push notifications are disabled.")
+        return False
+
+    cred_dict = json.loads(firebase_credentials_json)
+    cred = credentials.Certificate(cred_dict)
+    firebase_admin.initialize_app(cred)
+    logger.info("Firebase app initialized.")
+    return True
+
+# FCM accepts at most 500 tokens per multicast message
+_FCM_MULTICAST_LIMIT = 500
+# Short-lived in-memory cache of FCM tokens; invalidated when a token is registered
+_FCM_TOKEN_TTL = 60  # seconds
+_fcm_token_cache = {"tokens": [], "ts": 0.0}
+# Constant SQL text so asyncpg's per-connection statement cache reuses the prepared plan
+_FCM_TOKENS_QUERY = "SELECT fcm_token FROM users WHERE fcm_token IS NOT NULL AND fcm_token <> ''"
+
+def invalidate_fcm_token_cache():
+    """Force the next get_all_fcm_tokens call to reload tokens from the database"""
+    _fcm_token_cache["ts"] = 0.0
 
 async def get_all_fcm_tokens():
-    # Fetch all non-null FCM tokens from the users table
-    query = "SELECT fcm_token FROM users WHERE fcm_token IS NOT NULL"
+    now = time.monotonic()
+    if _fcm_token_cache["ts"] and now - _fcm_token_cache["ts"] < _FCM_TOKEN_TTL:
+        return _fcm_token_cache["tokens"]
+    # Fetch all non-empty FCM tokens from the users table
     logger.debug("Fetching all FCM tokens from users table")
-    results = await execute_query(query)
-    tokens = [row[0] for row in results if row[0]]
-    logger.debug(f"Fetched {len(tokens)} FCM tokens")
+    results = await execute_query(_FCM_TOKENS_QUERY)
+    tokens = [row["fcm_token"] for row in results]
+    logger.debug("Fetched %s FCM tokens", len(tokens))
+    _fcm_token_cache["tokens"] = tokens
+    _fcm_token_cache["ts"] = now
     return tokens
 
 async def send_push_sms_email_to_all(alert_data):
     logger.info("Preparing to send push notifications to all users")
+    if not ensure_firebase():
+        return
     tokens = await get_all_fcm_tokens()
     if not tokens:
         logger.warning("No FCM tokens to send push notifications.")
         print("No FCM tokens to send push notifications.")
         return
     # Create the notification message
-    logger.debug(f"Sending push notification with alert_data: {alert_data}")
-    message = messaging.MulticastMessage(
-        notification=messaging.Notification(
-            title="Emergency Alert",
-            body=alert_data.get("message", "An alert has been triggered!"),
-        ),
-        data={k: str(v) for k, v in alert_data.items()},
-        tokens=tokens,
+    logger.debug("Sending push notification with alert_data: %s", alert_data)
+    notification = messaging.Notification(
+        title="Emergency Alert",
+        body=alert_data.get("message", "An alert has been triggered!"),
     )
-    # Send the notification
+    data = {k: str(v) for k, v in alert_data.items()}
+    batches = [tokens[i:i + _FCM_MULTICAST_LIMIT] for i in range(0, len(tokens), _FCM_MULTICAST_LIMIT)]
+    # Send the notification, one multicast per batch of tokens, concurrently.
+    # The async variant talks to FCM over an async HTTP client, so the event loop is never blocked.
     try:
-        response = messaging.send_multicast(message)
-        logger.info(f"Successfully sent push notifications: {response.success_count} sent, {response.failure_count} failed.")
-        print(f"Successfully sent push notifications: {response.success_count} sent, {response.failure_count} failed.")
+        responses = await asyncio.gather(*(
+            messaging.send_each_for_multicast_async(
+                messaging.MulticastMessage(notification=notification, data=data, tokens=batch)
+            )
+            for batch in batches
+        ))
+        success_count = sum(r.success_count for r in responses)
+        failure_count = sum(r.failure_count for r in responses)
+        logger.info(f"Successfully sent push notifications: {success_count} sent, {failure_count} failed.")
+        print(f"Successfully sent push notifications: {success_count} sent, {failure_count} failed.")
     except Exception as e:
         logger.error(f"Error sending push notifications: {e}", exc_info=True)
 
@@ -95,9 +112,18 @@ def to_iso(val):
         return val.isoformat()
     return val
 
+async def _send_alert(ws: WebSocket, payload: str):
+    """Send a pre-serialized alert frame; returns the socket if the send failed"""
+    try:
+        await ws.send_text(payload)
+    except Exception as e:
+        logger.warning(f"WebSocket send failed for client {ws}: {e}")
+        return ws
+    return None
+
 async def trigger_alert(alert: AlertTrigger, current_user: dict = Depends(get_current_user)) -> dict:
     """Trigger a new alert"""
-    logger.debug(f"trigger_alert called by user: {current_user}")
+    logger.debug("trigger_alert called by user: %s", current_user)
     if current_user['role'] != 'emergency_service':
         logger.warning(f"Permission denied for user: {current_user}")
         return error_response("Permission denied", 403)
@@ -111,14 +137,14 @@ async def trigger_alert(alert: AlertTrigger, current_user: dict = Depends(get_cu
         VALUES ($1, $2, $3, $4, $5, $6, $7, $8, NOW(), $9)
         RETURNING id, created_at
         """
-        logger.debug(f"Executing alert insert query: {query} with params: {(alert_id, alert.trigger_source, alert.broadcast_type, alert.message, alert.broadcast_type, alert.location_lat, alert.location_lon, alert.radius_km, current_user['id'])}")
+        logger.debug("Executing alert insert query: %s with params: %s", query, (alert_id, alert.trigger_source, alert.broadcast_type, alert.message, alert.broadcast_type, alert.location_lat, alert.location_lon, alert.radius_km, current_user['id']))
         result = await execute_query(
             query,
             (alert_id, alert.trigger_source, alert.type, alert.message, alert.broadcast_type, alert.location_lat, alert.location_lon, alert.radius_km, current_user['id']),
             commit=True,
             fetch_one=True
         )
-        logger.debug(f"Alert inserted with result: {result}")
+        logger.debug("Alert inserted with result: %s", result)
 
         # After saving the alert and before returning:
         alert_data = {
@@ -130,51 +156,42 @@ async def trigger_alert(alert: AlertTrigger, current_user: dict = Depends(get_cu
             "location_lon": alert.location_lon,
             "radius_km": alert.radius_km,
             "broadcast_type": alert.broadcast_type,
-            "triggered_by": current_user['id']
+            "triggered_by": current_user['id'],
+            # Lets clients render the new alert without a follow-up GET /alerts/{id}
+            "triggered_by_username": current_user.get('username')
         }
-        logger.debug(f"Prepared alert_data for broadcast: {alert_data}")
+        logger.debug("Prepared alert_data for broadcast: %s", alert_data)
         # Determine recipients
         recipients = []
-        logger.debug(f"Alert broadcast type: {alert.broadcast_type}")
+        logger.debug("Alert broadcast type: %s", alert.broadcast_type)
         if alert.broadcast_type == "broadcast_all":
             logger.info(f"Broadcasting alert to all connected WebSocket clients: broadcast_type: {alert.broadcast_type}")
-            recipients = list(connected_alert_clients.keys())
+            recipients = alert_clients
             # Also send push/SMS/email to all users
             await send_push_sms_email_to_all(alert_data)
         else:
             # Only send to clients within radius
             logger.info(f"Broadcasting alert to clients within radius: broadcast_type: {alert.broadcast_type}")
-            for ws, info in list(connected_alert_clients.items()):
-                loc = info.get("location")
-                logger.debug(f"Checking client {ws} with location {loc}")
-                if loc and None not in loc:
-                    try:
-                        dist = haversine(alert.location_lat, alert.location_lon, float(loc[0]), float(loc[1]))
-                        logger.debug(f"Distance to client: {dist} km (radius: {alert.radius_km} km)")
-                        if dist <= alert.radius_km:
-                            recipients.append(ws)
-                            logger.debug(f"Client {ws} is within radius and will receive alert")
-                    except Exception as e:
-                        logger.warning(f"Error calculating distance for client {ws}: {e}")
-                        continue
+            logger.debug("Radius filter over %d connected clients", len(alert_clients))
+            recipients = alert_clients.within_radius(alert.location_lat, alert.location_lon, alert.radius_km)
         # Broadcast
         logger.info(f"Broadcasting alert to {len(recipients)} WebSocket clients")
-        for ws in recipients:
-            try:
-                logger.debug(f"Sending alert to WebSocket client: {ws}")
-                await ws.send_text(json.dumps({"event": "alert_triggered", "data": alert_data}))
-            except Exception as e:
-                logger.warning(f"WebSocket send failed for client {ws}: {e}")
-                try:
-                    connected_alert_clients.pop(ws, None)
-                    logger.info(f"Removed disconnected WebSocket client: {ws}")
-                except Exception as ex:
-                    logger.error(f"Error removing WebSocket client {ws}: {ex}")
+        # Serialize once for every recipient; json_default renders asyncpg's UUID alert id as a string
+        payload = orjson.dumps({"event": "alert_triggered", "data": alert_data}, default=json_default).decode()
+        # Send to every recipient concurrently so the broadcast takes max, not sum, of send latencies.
+        # gather consumes the recipients iterable before the first await, so the registry can be
+        # iterated directly; failed sockets are swept once afterwards.
+        results = await asyncio.gather(*(_send_alert(ws, payload) for ws in recipients))
+        for ws in results:
+            if ws is not None:
+                alert_clients.disconnect(ws)
+                logger.info(f"Removed disconnected WebSocket client: {ws}")
 
         logger.info(f"Alert {alert_id} triggered and notifications sent")
         return success_response({
             "alert_id": result[0],
-            "created_at": to_iso(result[1])
+            "created_at": to_iso(result[1]),
+            "triggered_by_username": alert_data["triggered_by_username"]
         }, "Alert triggered successfully")
     except Exception as e:
         logger.error(f"Error triggering alert: {e}", exc_info=True)
@@ -182,7 +199,7 @@ async def trigger_alert(alert: AlertTrigger, current_user: dict = Depends(get_cu
 
 async def resolve_alert(alert_id: str, current_user: dict = Depends(get_current_user)) -> dict:
     """Resolve an alert"""
-    logger.debug(f"resolve_alert called by user: {current_user} for alert_id: {alert_id}")
+    logger.debug("resolve_alert called by user: %s for alert_id: %s", current_user, alert_id)
     if current_user['role'] != 'emergency_service':
         logger.warning(f"Permission denied for user: {current_user}")
         return error_response("Permission denied", 403)
@@ -195,9 +212,9 @@ async def resolve_alert(alert_id: str, current_user: dict = Depends(get_current_
         WHERE id = $1
         RETURNING id
         """
-        logger.debug(f"Executing alert resolve query: {query} with alert_id: {alert_id}")
+        logger.debug("Executing alert resolve query: %s with alert_id: %s", query, alert_id)
         result = await execute_query(query, (alert_id,), commit=True, fetch_one=True)
-        logger.debug(f"Alert resolve query result: {result}")
+        logger.debug("Alert resolve query result: %s", result)
         if not result:
             logger.warning(f"Alert not found: {alert_id}")
             return error_response("Alert not found", 404)
@@ -210,7 +227,7 @@ async def resolve_alert(alert_id: str, current_user: dict = Depends(get_current_
 
 async def cool_down_alert(alert_id: str, current_user: dict = Depends(get_current_user)) -> dict:
     """cool down an alert"""
-    logger.debug(f"cool_down_alert called by user: {current_user} for alert_id: {alert_id}")
+    logger.debug("cool_down_alert called by user: %s for alert_id: %s", current_user, alert_id)
     if current_user['role'] != 'emergency_service':
         logger.warning(f"Permission denied for user: {current_user}")
         return error_response("Permission denied", 403)
@@ -223,9 +240,9 @@ async def cool_down_alert(alert_id: str, current_user: dict = Depends(get_curren
         WHERE id = $1
         RETURNING id
         """
-        logger.debug(f"Executing alert cooldown query: {query} with alert_id: {alert_id}")
+        logger.debug("Executing alert cooldown query: %s with alert_id: %s", query, alert_id)
         result = await execute_query(query, (alert_id,), commit=True, fetch_one=True)
-        logger.debug(f"Alert cooldown query result: {result}")
+        logger.debug("Alert cooldown query result: %s", result)
         if not result:
             logger.warning(f"Alert not found: {alert_id}")
             return error_response("Alert not found", 404)
@@ -240,14 +257,14 @@ async def get_all_active_alerts() -> dict:
     """Get active alerts"""
     logger.debug("get_alerts called to fetch active alerts")
     try:
-        query = """
-        SELECT * FROM alerts 
+        query = f"""
+        SELECT {ALERT_COLS} FROM alerts
         WHERE status = 'ACTIVE'
         ORDER BY created_at DESC
         """
-        logger.debug(f"Executing get_alerts query: {query}")
+        logger.debug("Executing get_alerts query: %s", query)
         results = await execute_query(query)
-        logger.debug(f"Fetched alerts: {results}")
+        logger.debug("Fetched alerts: %s", results)
         alerts = [
             serialize_row(r)
             for r in results
@@ -270,10 +287,10 @@ async def get_all_alerts(filters: dict = None) -> dict:
     logger = logging.getLogger("alerts.manager")
     logger.info(f"Retrieving alerts with filters: {filters}")
     try:
-        query = """
-            SELECT * FROM alerts
+        # COUNT(*) OVER () returns the filtered total alongside each row, saving a second query
+        query = f"""
+            SELECT {ALERT_COLS}, COUNT(*) OVER () AS _total FROM alerts
         """
-        count_query = "SELECT COUNT(*) FROM alerts"
         params = []
         conditions = []
         param_index = 1
@@ -291,23 +308,25 @@ async def get_all_alerts(filters: dict = None) -> dict:
         if conditions:
             where_clause = ' WHERE ' + ' AND '.join(conditions)
             query += where_clause
-            count_query += where_clause
 
         # Pagination
         page = int(filters.get('page', 1)) if filters and filters.get('page') else 1
         page_size = int(filters.get('page_size', 10)) if filters and filters.get('page_size') else 10
         offset = (page - 1) * page_size
-        query += f" ORDER BY created_at DESC LIMIT {page_size} OFFSET {offset}"
+        # Bind LIMIT/OFFSET so every page shares one prepared statement
+        query += f" ORDER BY created_at DESC LIMIT ${param_index} OFFSET ${param_index + 1}"
+        params.extend([page_size, offset])
 
-        logger.debug(f"Executing query: {query} with params: {params}")
+        logger.debug("Executing query: %s with params: %s", query, params)
         results = await execute_query(query, tuple(params))
-        total_count_result = await execute_query(count_query, tuple(params))
-        total_count = total_count_result[0][0] if total_count_result else 0
+        total_count = results[0]["_total"] if results else 0
 
         alerts = [
             serialize_row(r)
             for r in results
         ]
+        for a in alerts:
+            a.pop("_total", None)
 
         base_url = '/api/alerts/'
         next_page = None
@@ -6,31 +6,32 @@ from modules.shared.response import success_response, error_response
 from uuid import uuid4
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
-import json
+import orjson
 import logging
 from modules.shared.db import execute_query
-from .manager import connected_alert_clients
+from .manager import invalidate_fcm_token_cache
+from .utils import alert_clients
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
-# Store client info: {websocket: {"location": (lat, lon), "user_id": ...}}
+# Connected clients and their locations live in alert_clients (see utils.ClientRegistry)
 
 router = APIRouter()
 
 @router.post("/trigger")
 async def trigger(trigger: AlertTrigger, current_user: dict = Depends(get_current_user)):
-    logger.debug(f"Trigger endpoint called by user: {current_user} with trigger: {trigger}")
+    logger.debug("Trigger endpoint called by user: %s with trigger: %s", current_user, trigger)
     return await trigger_alert(trigger, current_user)
 
 @router.post("/{alert_id}/resolve")
 async def resolve(alert_id: str, current_user: dict = Depends(get_current_user)):
-    logger.debug(f"Resolve endpoint called by user: {current_user} for alert_id: {alert_id}")
+    logger.debug("Resolve endpoint called by user: %s for alert_id: %s", current_user, alert_id)
     return await resolve_alert(alert_id, current_user)
 
 @router.post("/{alert_id}/cooldown")
 async def resolve(alert_id: str, current_user: dict = Depends(get_current_user)):
-    logger.debug(f"Cooldown endpoint called by user: {current_user} for alert_id: {alert_id}")
+    logger.debug("Cooldown endpoint called by user: %s for alert_id: %s", current_user, alert_id)
     return await cool_down_alert(alert_id, current_user)
 
 @router.get("/")
@@ -87,30 +88,30 @@ async def register_fcm_token(request: Request, current_user: dict = Depends(get_
     # Update the user's FCM token in the database
     query = "UPDATE users SET fcm_token = $1 WHERE id = $2"
     await execute_query(query, (fcm_token, user_id), commit=True)
+    invalidate_fcm_token_cache()
     return success_response({}, "FCM token registered successfully")
 
 @router.websocket("/ws/alerts")
 async def websocket_alerts(websocket: WebSocket):
     logger.info("WebSocket connection requested")
     await websocket.accept()
-    connected_alert_clients[websocket] = {"location": None, "user_id": None}
-    logger.debug(f"WebSocket client connected: {websocket.client}")
+    alert_clients.connect(websocket)
+    logger.debug("WebSocket client connected: %s", websocket.client)
     try:
         while True:
             data = await websocket.receive_text()
-            logger.debug(f"Received data from WebSocket client: {data}")
+            logger.debug("Received data from WebSocket client: %s", data)
             try:
-                msg = json.loads(data)
+                msg = orjson.loads(data)
                 if msg.get("type") == "register_location":
                     lat = msg.get("lat")
                     lon = msg.get("lon")
                     user_id = msg.get("user_id")
-                    connected_alert_clients[websocket]["location"] = (lat, lon)
-                    connected_alert_clients[websocket]["user_id"] = user_id
+                    alert_clients.register_location(websocket, lat, lon, user_id)
                     logger.info(f"Registered location for user_id={user_id}: lat={lat}, lon={lon}")
             except Exception as e:
                 logger.warning(f"Malformed message from WebSocket client: {data}, error: {e}")
                 pass  # Ignore malformed messages
     except WebSocketDisconnect:
         logger.info(f"WebSocket client disconnected: {websocket.client}")
-        connected_alert_clients.pop(websocket, None)
\ No newline at end of file
+        alert_clients.disconnect(websocket)
\ No newline at end of file
@@ -0,0 +1,171 @@
+import math
+from typing import Any, Iterator, Optional
+
+import numpy as np
+from fastapi import WebSocket
+
+EARTH_RADIUS_KM = 6371
+
+# Coarse lat/lon grid buckets so a radius broadcast only inspects clients in nearby cells
+_CELL_DEG = 0.1  # ~11 km per cell edge at the equator
+_LON_CELLS = int(round(360 / _CELL_DEG))
+
+
+def _cell_for(lat, lon):
+    """Grid cell (lat_idx, lon_idx) containing the given point"""
+    return int(math.floor(lat / _CELL_DEG)), int(math.floor(lon / _CELL_DEG)) % _LON_CELLS
+
+
+def _cells_covering(lat, lon, radius_km, max_cells):
+    """
+    Grid cells intersecting the bounding box of the circle around (lat, lon).
+    Returns None when the box spans more than max_cells cells, in which case
+    a full scan is cheaper than enumerating cells.
+    """
+    r = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(r)
+    lat_lo, lat_hi = lat - dlat, lat + dlat
+    lat_cells = range(int(math.floor(max(lat_lo, -90) / _CELL_DEG)), int(math.floor(min(lat_hi, 90) / _CELL_DEG)) + 1)
+    sin_ratio = math.sin(r) / math.cos(math.radians(lat)) if abs(lat) < 90 else 2
+    if lat_lo <= -90 or lat_hi >= 90 or sin_ratio >= 1:
+        lon_cells = range(_LON_CELLS)
+    else:
+        dlon = math.degrees(math.asin(sin_ratio))
+        lon_lo = int(math.floor((lon - dlon) / _CELL_DEG))
+        lon_hi = int(math.floor((lon + dlon) / _CELL_DEG))
+        if lon_hi - lon_lo + 1 >= _LON_CELLS:
+            lon_cells = range(_LON_CELLS)
+        else:
+            lon_cells = [c % _LON_CELLS for c in range(lon_lo, lon_hi + 1)]
+    if len(lat_cells) * len(lon_cells) > max_cells:
+        return None
+    return [(a, b) for a in lat_cells for b in lon_cells]
+
+
+class ClientRegistry:
+    """
+    Connected alert WebSocket clients stored as parallel arrays (structure of arrays).
+    Each client owns a slot; freed slots are recycled through a free-list and hold NaN
+    coordinates, so they never pass a vectorized radius check.
+
+    Besides raw lat/lon, the half-angle sines/cosines of each client's coordinates are
+    precomputed at registration, so a radius check needs no per-client trig calls.
+    """
+    _ARRAYS = ("lats", "lons", "sin_half_phi", "cos_half_phi", "cos_phi", "sin_half_lam", "cos_half_lam")
+
+    def __init__(self, capacity: int = 64) -> None:
+        self.ws_list: list[Optional[WebSocket]] = [None] * capacity
+        self.user_ids: list[Any] = [None] * capacity
+        for name in self._ARRAYS:
+            setattr(self, name, np.full(capacity, np.nan))
+        self.index: dict[WebSocket, int] = {}
+        self.free: list[int] = list(range(capacity - 1, -1, -1))
+        self._cell_buckets: dict[tuple[int, int], set[int]] = {}
+        self._slot_cell: dict[int, tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __iter__(self) -> Iterator[WebSocket]:
+        return iter(self.index)
+
+    def __contains__(self, ws: WebSocket) -> bool:
+        return ws in self.index
+
+    def _grow(self) -> None:
+        capacity = len(self.ws_list)
+        self.ws_list.extend([None] * capacity)
+        self.user_ids.extend([None] * capacity)
+        for name in self._ARRAYS:
+            setattr(self, name, np.concatenate([getattr(self, name), np.full(capacity, np.nan)]))
+        self.free.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+    def connect(self, ws: WebSocket) -> int:
+        """Allocate a slot for a newly connected client"""
+        slot = self.index.get(ws)
+        if slot is not None:
+            return slot
+        if not self.free:
+            self._grow()
+        slot = self.free.pop()
+        self.index[ws] = slot
+        self.ws_list[slot] = ws
+        return slot
+
+    def register_location(self, ws: WebSocket, lat, lon, user_id=None) -> None:
+        """Record a client's location; a missing lat/lon clears it"""
+        slot = self.connect(ws)
+        self.user_ids[slot] = user_id
+        if lat is None or lon is None:
+            self._clear_location(slot)
+            return
+        lat, lon = float(lat), float(lon)
+        phi, lam = math.radians(lat), math.radians(lon)
+        self.lats[slot] = lat
+        self.lons[slot] = lon
+        self.sin_half_phi[slot] = math.sin(phi / 2)
+        self.cos_half_phi[slot] = math.cos(phi / 2)
+        self.cos_phi[slot] = math.cos(phi)
+        self.sin_half_lam[slot] = math.sin(lam / 2)
+        self.cos_half_lam[slot] = math.cos(lam / 2)
+        cell = _cell_for(lat, lon)
+        old_cell = self._slot_cell.get(slot)
+        if old_cell != cell:
+            if old_cell is not None:
+                self._discard_from_cell(slot, old_cell)
+            self._cell_buckets.setdefault(cell, set()).add(slot)
+            self._slot_cell[slot] = cell
+
+    def disconnect(self, ws: WebSocket) -> None:
+        """Release a client's slot back to the free-list"""
+        slot = self.index.pop(ws, None)
+        if slot is None:
+            return
+        self._clear_location(slot)
+        self.ws_list[slot] = None
+        self.user_ids[slot] = None
+        self.free.append(slot)
+
+    def _clear_location(self, slot: int) -> None:
+        for name in self._ARRAYS:
+            getattr(self, name)[slot] = np.nan
+        cell = self._slot_cell.pop(slot, None)
+        if cell is not None:
+            self._discard_from_cell(slot, cell)
+
+    def _discard_from_cell(self, slot: int, cell) -> None:
+        bucket = self._cell_buckets.get(cell)
+        if bucket is not None:
+            bucket.discard(slot)
+            if not bucket:
+                del self._cell_buckets[cell]
+
+    def distances_km(self, lat, lon, idx=slice(None)):
+        """
+        Haversine distance in km from (lat, lon) to the clients in idx, using the
+        angle-difference identity sin((b - a) / 2) = sin(b/2)cos(a/2) - cos(b/2)sin(a/2)
+        over the precomputed per-client terms.
+        """
+        phi, lam = math.radians(lat), math.radians(lon)
+        sin_half_dphi = self.sin_half_phi[idx] * math.cos(phi / 2) - self.cos_half_phi[idx] * math.sin(phi / 2)
+        sin_half_dlam = self.sin_half_lam[idx] * math.cos(lam / 2) - self.cos_half_lam[idx] * math.sin(lam / 2)
+        a = sin_half_dphi ** 2 + self.cos_phi[idx] * math.cos(phi) * sin_half_dlam ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    def within_radius(self, lat, lon, radius_km) -> list[WebSocket]:
+        """Return the clients whose registered location is within radius_km of (lat, lon)"""
+        if not self._slot_cell or lat is None or lon is None:
+            return []
+        cells = _cells_covering(lat, lon, radius_km, len(self._cell_buckets))
+        if cells is None:
+            distances = self.distances_km(lat, lon)
+            return [self.ws_list[i] for i in np.flatnonzero(distances <= radius_km)]
+        candidates = [slot for cell in cells for slot in self._cell_buckets.get(cell, ())]
+        if not candidates:
+            return []
+        idx = np.fromiter(candidates, dtype=np.intp, count=len(candidates))
+        distances = self.distances_km(lat, lon, idx)
+        return [self.ws_list[i] for i in idx[distances <= radius_km]]
+
+
+alert_clients = ClientRegistry()
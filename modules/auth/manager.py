@@ -1,231 +1,298 @@
+import asyncio
 import logging
-from uuid import uuid4
-from modules.auth.models import UserRegister, UserLogin, ForgotPasswordRequest, ResetPasswordRequest
-from modules.auth.utils import hash_password, verify_password, decode_token, create_access_token, create_reset_token_jwt, verify_reset_token
+from modules.auth.models import UserRegister, UserLogin, ForgotPasswordRequest, ResetPasswordRequest, UserRow
+from modules.auth.utils import hash_password, verify_password, password_needs_rehash, password_hasher, decode_token, create_access_token, generate_reset_token, hash_reset_token, login_ip_limiter, login_user_limiter, forgot_password_limiter
 from modules.shared.db import execute_query
-from modules.shared.response import success_response, error_response
+from cachetools import TTLCache
+from modules.shared.response import success_response
 from modules.shared.email_service import send_password_reset_email
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
 
 # Configure logger
 logger = logging.getLogger("auth.manager")
-logging.basicConfig(level=logging.INFO)
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+class _BearerToken(OAuth2PasswordBearer):
+    """
+    OAuth2 password bearer scheme, kept so OpenAPI still documents the login flow,
+    but extracting the token with a plain prefix check instead of Starlette's scheme parsing.
+    """
+    async def __call__(self, request: Request) -> str:
+        authorization = request.headers.get("authorization")
+        if not authorization or not (authorization.startswith("Bearer ") or authorization.startswith("bearer ")):
+            raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+        return authorization[7:]
+
+_bearer = _BearerToken(tokenUrl="/api/auth/login", scheme_name="OAuth2PasswordBearer")
+
+# Verified against when the user does not exist, so unknown users cost the same as wrong passwords
+_DUMMY_HASH = password_hasher.hash("unused-placeholder")
+
+# Bumped whenever the user claims embedded in access tokens change; tokens carrying an
+# older (or no) version fall back to a database lookup until they expire
+TOKEN_CLAIMS_VERSION = 1
+
+# Constant SQL text so asyncpg's per-connection statement cache reuses the prepared plans
+_REGISTER_INSERT = """
+    INSERT INTO users (id, username, email, password_hash, role, created_at)
+    VALUES (gen_random_uuid(), $1, $2, $3, $4, NOW())
+    ON CONFLICT DO NOTHING
+    RETURNING id, username, email, role, created_at, last_login_at
+"""
+_REGISTER_CONFLICT = """
+    SELECT username = $1 AS username_taken FROM users
+    WHERE username = $1 OR lower(email) = lower($2)
+    LIMIT 1
+"""
+_LOGIN_SELECT = """
+    SELECT id, username, email, password_hash, role, created_at, last_login_at FROM users
+    WHERE username = $1 OR lower(email) = lower($1)
+    LIMIT 1
+"""
+_LOGIN_TOUCH = """
+    UPDATE users SET last_login_at = NOW()
+    WHERE id = $1 AND (last_login_at IS NULL OR last_login_at < NOW() - INTERVAL '60 seconds')
+"""
+_ME_SELECT = """
+    SELECT id, username, email, role, created_at, last_login_at
+    FROM users
+    WHERE id = $1
+"""
+
+# Database user lookups keyed by (sub, iat), so a reissued token naturally misses
+_user_cache = TTLCache(maxsize=5000, ttl=60)
+_user_cache_stats = {"hits": 0, "misses": 0}
+
+def get_user_cache_stats() -> dict:
+    """Hit/miss counters for the user lookup cache"""
+    total = _user_cache_stats["hits"] + _user_cache_stats["misses"]
+    return {
+        **_user_cache_stats,
+        "size": len(_user_cache),
+        "hit_rate": _user_cache_stats["hits"] / total if total else 0.0
+    }
+
+# Strong references to fire-and-forget tasks so they are not garbage collected mid-flight
+_background_tasks = set()
+
+def _run_in_background(coro) -> None:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+async def _touch_last_login(user_id) -> None:
+    """Record a login, at most once a minute per user"""
+    try:
+        await execute_query(_LOGIN_TOUCH, (user_id,), commit=True)
+        logger.debug("Updated last_login_at for user id: %s", user_id)
+    except Exception as e:
+        logger.error("Error updating last_login_at for user id %s: %s", user_id, e)
 
 async def register_user(user: UserRegister) -> dict:
     """Register a new user"""
-    logger.info(f"Attempting to register user: {user.username}")
-    try:
-        user_id = str(uuid4())
-        hashed_password = hash_password(user.password)
-        logger.debug(f"Generated user_id: {user_id}, hashed_password: {hashed_password}")
-        result = await execute_query(
-            """
-            INSERT INTO users (id, username, email, password_hash, role, created_at)
-            VALUES ($1, $2, $3, $4, $5, NOW())
-            RETURNING id, username, email, role, created_at
-            """,
-            (user_id, user.username, user.email, hashed_password, user.role),
-            commit=True,
+    logger.info("Attempting to register user: %s", user.username)
+    hashed_password = await hash_password(user.password)
+    result = await execute_query(
+        _REGISTER_INSERT,
+        (user.username, user.email, hashed_password, user.role),
+        commit=True,
+        fetch_one=True
+    )
+    if not result:
+        conflict = await execute_query(
+            _REGISTER_CONFLICT,
+            (user.username, user.email),
             fetch_one=True
         )
-        if not result:
-            logger.warning(f"Registration failed: Username '{user.username}' may already exist.")
-            raise error_response("Username already exists", 400)
-        logger.info(f"User registered successfully: {result[1]} (id: {result[0]})")
-        return success_response({
-            "id": result[0],
-            "username": result[1],
-            "email": result[2],
-            "role": result[3],
-            "created_at": result[4].isoformat()
-        }, "User registered successfully")
-    except Exception as e:
-        logger.error(f"Error registering user '{user.username}': {e}")
-        return error_response(str(e), 500)
+        if conflict and conflict["username_taken"]:
+            logger.warning("Registration failed: Username '%s' already exists.", user.username)
+            raise HTTPException(status_code=409, detail="Username already exists")
+        logger.warning("Registration failed: Email for user '%s' already exists.", user.username)
+        raise HTTPException(status_code=409, detail="Email already exists")
+    logger.info("User registered successfully: %s (id: %s)", result["username"], result["id"])
+    return success_response(UserRow.from_record(result).as_json(), "User registered successfully")
 
-async def login_user(user: UserLogin) -> dict:
+async def login_user(user: UserLogin, client_ip: str) -> dict:
     """Authenticate user and return JWT and user data"""
-    logger.info(f"Attempting login for user: {user.email_or_username}")
-    try:
-        result = await execute_query(
-            """
-            SELECT id, username, email, password_hash, role, created_at, last_login_at FROM users
-            WHERE username = $1 OR email = $1
-            """,
-            (user.email_or_username,),
-            fetch_one=True
-        )
-        if not result:
-            logger.warning(f"Login failed: User '{user.email_or_username}' not found.")
-        if not result or not verify_password(user.password, result[3]):
-            logger.warning(f"Login failed: Invalid credentials for user '{user.email_or_username}'.")
-            return error_response("Invalid credentials", 401)
-        
-        token = create_access_token({"sub": str(result[0]), "role": result[4]})
-        logger.info(f"User '{user.email_or_username}' authenticated successfully. Token generated.")
+    logger.info("Attempting login for user: %s", user.email_or_username)
+    # Tokens are taken up front so concurrent floods still stop before the KDF; a successful
+    # login hands them back, so only failed attempts count against the IP and the account
+    user_key = user.email_or_username.lower()
+    if not login_ip_limiter.hit(client_ip):
+        logger.warning("Login rate limit exceeded for user '%s' from %s.", user.email_or_username, client_ip)
+        raise HTTPException(status_code=429, detail="Too many login attempts, please try again later")
+    if not login_user_limiter.hit(user_key):
+        login_ip_limiter.refund(client_ip)
+        logger.warning("Login rate limit exceeded for user '%s' from %s.", user.email_or_username, client_ip)
+        raise HTTPException(status_code=429, detail="Too many login attempts, please try again later")
+    result = await execute_query(
+        _LOGIN_SELECT,
+        (user.email_or_username,),
+        fetch_one=True
+    )
+    password_ok = await verify_password(user.password, result["password_hash"] if result else _DUMMY_HASH)
+    if not result or not password_ok:
+        logger.warning("Login failed: Invalid credentials for user '%s'.", user.email_or_username)
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    if password_needs_rehash(result["password_hash"]):
+        # Upgrade legacy bcrypt hashes to argon2id now that the plaintext is known
         await execute_query(
-            """
-            UPDATE users SET last_login_at = NOW()
-            WHERE id = $1
-            """,
-            (result[0],),
+            "UPDATE users SET password_hash = $1 WHERE id = $2",
+            (await hash_password(user.password), result["id"]),
             commit=True
         )
-        logger.debug(f"Updated last_login_at for user id: {result[0]}")
-        user_data = {
-            "id": result[0],
-            "username": result[1],
-            "email": result[2],
-            "role": result[4],
-            "created_at": result[5].isoformat() if result[5] else None,
-            "last_login_at": result[6].isoformat() if result[6] else None
-        }
-        return success_response({"token": token, "user": user_data}, "Login successful")
-    except Exception as e:
-        logger.error(f"Error logging in user '{user.email_or_username}': {e}")
-        return error_response(str(e), 500)
+        logger.info("Rehashed password for user id: %s", result["id"])
+
+    user_data = UserRow.from_record(result).as_json()
+    token = create_access_token({
+        "sub": str(user_data["id"]),
+        "role": user_data["role"],
+        "username": user_data["username"],
+        "email": user_data["email"],
+        "created_at_iso": user_data["created_at"],
+        "v": TOKEN_CLAIMS_VERSION
+    })
+    login_ip_limiter.refund(client_ip)
+    login_user_limiter.refund(user_key)
+    logger.info("User '%s' authenticated successfully. Token generated.", user.email_or_username)
+    _run_in_background(_touch_last_login(result["id"]))
+    return success_response({"token": token, "user": user_data}, "Login successful")
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
-    """Get current user from JWT"""
-    logger.debug("Decoding JWT token for current user.")
+def _decode_bearer(token: str) -> dict:
     payload = decode_token(token)
     if not payload:
         logger.warning("Invalid token provided.")
         raise HTTPException(status_code=401, detail="Invalid token")
-    
-    logger.info(f"Fetching user with id: {payload['sub']}")
+    return payload
+
+async def _fetch_user(payload: dict) -> dict:
+    key = (payload["sub"], payload.get("iat", 0))
+    cached = _user_cache.get(key)
+    if cached is not None:
+        _user_cache_stats["hits"] += 1
+        return cached
+    _user_cache_stats["misses"] += 1
+    user_id = payload["sub"]
+    logger.info("Fetching user with id: %s", user_id)
     result = await execute_query(
-        """
-        SELECT id, username, email, role, created_at, last_login_at 
-        FROM users 
-        WHERE id = $1
-        """,
-        (payload["sub"],),
+        _ME_SELECT,
+        (user_id,),
         fetch_one=True
     )
     if not result:
-        logger.warning(f"User not found for id: {payload['sub']}")
+        logger.warning("User not found for id: %s", user_id)
         raise HTTPException(status_code=401, detail="User not found")
     
-    logger.info(f"User fetched successfully: {result[1]} (id: {result[0]})")
+    logger.info("User fetched successfully: %s (id: %s)", result["username"], result["id"])
+    user = UserRow.from_record(result).as_json()
+    _user_cache[key] = user
+    return user
+
+async def get_current_user(token: str = Depends(_bearer)) -> dict:
+    """Get current user from the JWT claims, without a database round-trip"""
+    payload = _decode_bearer(token)
+    if payload.get("v") != TOKEN_CLAIMS_VERSION:
+        return await _fetch_user(payload)
     return {
-        "id": result[0],
-        "username": result[1],
-        "email": result[2],
-        "role": result[3],
-        "created_at": result[4].isoformat(),
-        "last_login_at": result[5].isoformat() if result[5] else None
+        "id": payload["sub"],
+        "username": payload["username"],
+        "email": payload["email"],
+        "role": payload["role"],
+        "created_at": payload["created_at_iso"]
     }
 
+async def get_current_user_fresh(token: str = Depends(_bearer)) -> dict:
+    """Get current user from the database (cached briefly per issued token)"""
+    payload = _decode_bearer(token)
+    return await _fetch_user(payload)
+
 async def forgot_password(request: ForgotPasswordRequest) -> dict:
     """Generate password reset token and send reset email"""
-    logger.info(f"Password reset requested for email: {request.email}")
-    try:
-        # Check if user exists with this email
-        result = await execute_query(
-            """
-            SELECT id, username FROM users 
-            WHERE email = $1
-            """,
-            (request.email,),
-            fetch_one=True
-        )
-        
-        if not result:
-            logger.warning(f"Password reset requested for non-existent email: {request.email}")
-            # Return success even if user doesn't exist for security
-            return success_response({}, "If the email exists, a password reset link has been sent")
-        
-        user_id = result[0]
-        username = result[1]
-        
-        # Generate reset token
-        reset_token = create_reset_token_jwt(str(user_id))
-        
-        # Store reset token in database (you may want to create a password_reset_tokens table)
-        await execute_query(
-            """
-            INSERT INTO password_reset_tokens (user_id, token, created_at, expires_at)
-            VALUES ($1, $2, NOW(), NOW() + INTERVAL '1 hour')
-            ON CONFLICT (user_id) DO UPDATE SET
-                token = EXCLUDED.token,
-                created_at = EXCLUDED.created_at,
-                expires_at = EXCLUDED.expires_at
-            """,
-            (user_id, reset_token),
-            commit=True
-        )
-        
-        # Send password reset email
-        email_sent = await send_password_reset_email(request.email, reset_token, username)
-        
-        if email_sent:
-            logger.info(f"Password reset email sent successfully to {request.email}")
-        else:
-            logger.warning(f"Failed to send password reset email to {request.email}")
-        
-        return success_response({
-            "message": "If the email exists, a password reset link has been sent"
-        }, "Password reset email sent")
-        
-    except Exception as e:
-        logger.error(f"Error processing password reset for {request.email}: {e}")
-        return error_response("Failed to process password reset request", 500)
+    logger.info("Password reset requested for email: %s", request.email)
+    if not forgot_password_limiter.hit(request.email.lower()):
+        logger.warning("Password reset rate limit exceeded for email: %s", request.email)
+        raise HTTPException(status_code=429, detail="Too many password reset requests, please try again later")
+    # Check if user exists with this email
+    result = await execute_query(
+        """
+        SELECT id, username FROM users 
+        WHERE lower(email) = lower($1)
+        """,
+        (request.email,),
+        fetch_one=True
+    )
+    
+    if not result:
+        logger.warning("Password reset requested for non-existent email: %s", request.email)
+        # Return success even if user doesn't exist for security
+        return success_response({}, "If the email exists, a password reset link has been sent")
+    
+    user_id = result["id"]
+    username = result["username"]
+    
+    # Generate an opaque reset token; only its hash is stored
+    reset_token = generate_reset_token()
+    
+    await execute_query(
+        """
+        INSERT INTO password_reset_tokens (user_id, token, created_at, expires_at)
+        VALUES ($1, $2, NOW(), NOW() + INTERVAL '1 hour')
+        ON CONFLICT (user_id) DO UPDATE SET
+            token = EXCLUDED.token,
+            created_at = EXCLUDED.created_at,
+            expires_at = EXCLUDED.expires_at
+        """,
+        (user_id, hash_reset_token(reset_token)),
+        commit=True
+    )
+    
+    # Send password reset email
+    email_sent = await send_password_reset_email(request.email, reset_token, username)
+    
+    if email_sent:
+        logger.info("Password reset email sent successfully to %s", request.email)
+    else:
+        logger.warning("Failed to send password reset email to %s", request.email)
+    
+    return success_response({
+        "message": "If the email exists, a password reset link has been sent"
+    }, "Password reset email sent")
+    
 
 async def reset_password(request: ResetPasswordRequest) -> dict:
     """Reset user password using valid reset token"""
     logger.info("Password reset attempt with token")
-    try:
-        # Verify the reset token
-        payload = verify_reset_token(request.token)
-        if not payload:
-            logger.warning("Invalid or expired reset token used")
-            return error_response("Invalid or expired reset token", 400)
-        
-        user_id = payload["sub"]
-        
-        # Verify token exists in database and hasn't expired
-        result = await execute_query(
-            """
-            SELECT user_id FROM password_reset_tokens 
-            WHERE user_id = $1 AND token = $2 AND expires_at > NOW()
-            """,
-            (user_id, request.token),
-            fetch_one=True
-        )
-        
-        if not result:
-            logger.warning(f"Reset token not found or expired for user: {user_id}")
-            return error_response("Invalid or expired reset token", 400)
-        
-        # Hash the new password
-        hashed_password = hash_password(request.new_password)
-        
-        # Update user password
-        await execute_query(
-            """
-            UPDATE users SET password_hash = $1, last_login_at = NOW()
-            WHERE id = $2
-            """,
-            (hashed_password, user_id),
-            commit=True
-        )
-        
-        # Delete the used reset token
-        await execute_query(
-            """
-            DELETE FROM password_reset_tokens WHERE user_id = $1
-            """,
-            (user_id,),
-            commit=True
-        )
-        
-        logger.info(f"Password successfully reset for user: {user_id}")
-        return success_response({}, "Password reset successfully")
-        
-    except Exception as e:
-        logger.error(f"Error resetting password: {e}")
-        return error_response("Failed to reset password", 500)
\ No newline at end of file
+    # Consume the token: lookup, expiry check and single use in one statement
+    result = await execute_query(
+        """
+        DELETE FROM password_reset_tokens
+        WHERE token = $1 AND expires_at > NOW()
+        RETURNING user_id
+        """,
+        (hash_reset_token(request.token),),
+        fetch_one=True
+    )
+    
+    if not result:
+        logger.warning("Invalid or expired reset token used")
+        raise HTTPException(status_code=400, detail="Invalid or expired reset token")
+    
+    user_id = result["user_id"]
+    
+    # Hash the new password
+    hashed_password = await hash_password(request.new_password)
+    
+    # Update user password
+    await execute_query(
+        """
+        UPDATE users SET password_hash = $1, last_login_at = NOW()
+        WHERE id = $2
+        """,
+        (hashed_password, user_id),
+        commit=True
+    )
+    
+    logger.info("Password successfully reset for user: %s", user_id)
+    return success_response({}, "Password reset successfully")
+    
\ No newline at end of file
@@ -1,16 +1,22 @@
-from pydantic import BaseModel
+from dataclasses import dataclass
+from datetime import datetime
+from pydantic import BaseModel, Field
 from typing import Optional
 from uuid import UUID
 
+# Cheap shape checks, so garbage input is rejected before the password KDF and the database
+USERNAME_PATTERN = r"^[A-Za-z0-9_.-]+$"
+EMAIL_PATTERN = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+
 class UserRegister(BaseModel):
-    username: str
-    email: str
-    password: str
+    username: str = Field(min_length=3, max_length=32, pattern=USERNAME_PATTERN)
+    email: str = Field(max_length=100, pattern=EMAIL_PATTERN)
+    password: str = Field(min_length=8, max_length=128)
     role: Optional[str] = "citizen"
 
 class UserLogin(BaseModel):
-    email_or_username: str
-    password: str
+    email_or_username: str = Field(min_length=1, max_length=100)
+    password: str = Field(min_length=1, max_length=128)
 
 class UserResponse(BaseModel):
     id: UUID
@@ -21,8 +27,39 @@ class UserResponse(BaseModel):
     last_login_at: Optional[str]
 
 class ForgotPasswordRequest(BaseModel):
-    email: str
+    email: str = Field(max_length=100, pattern=EMAIL_PATTERN)
 
 class ResetPasswordRequest(BaseModel):
-    token: str
-    new_password: str
\ No newline at end of file
+    token: str = Field(min_length=1, max_length=256)
+    new_password: str = Field(min_length=8, max_length=128)
+
+@dataclass(slots=True)
+class UserRow:
+    """Public user fields from a users row; password_hash is never carried"""
+    id: UUID
+    username: str
+    email: str
+    role: str
+    created_at: Optional[datetime]
+    last_login_at: Optional[datetime] = None
+
+    @classmethod
+    def from_record(cls, record) -> "UserRow":
+        return cls(
+            record["id"],
+            record["username"],
+            record["email"],
+            record["role"],
+            record["created_at"],
+            record.get("last_login_at")
+        )
+
+    def as_json(self) -> dict:
+        return {
+            "id": self.id,
+            "username": self.username,
+            "email": self.email,
+            "role": self.role,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "last_login_at": self.last_login_at.isoformat() if self.last_login_at else None
+        }
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from .models import UserRegister, UserLogin, UserResponse, ForgotPasswordRequest, ResetPasswordRequest
-from .manager import register_user, login_user, get_current_user, forgot_password, reset_password
+from .manager import register_user, login_user, get_current_user_fresh, forgot_password, reset_password, get_user_cache_stats
 from modules.shared.response import success_response, error_response
 router = APIRouter()
 
@@ -10,12 +10,13 @@ async def register(user: UserRegister):
     return await register_user(user)
 
 @router.post("/login")
-async def login(user: UserLogin):
+async def login(user: UserLogin, request: Request):
     """Authenticate user"""
-    return await login_user(user)
+    client_ip = request.client.host if request.client else "unknown"
+    return await login_user(user, client_ip)
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: dict = Depends(get_current_user)):
+async def get_me(current_user: dict = Depends(get_current_user_fresh)):
     """Get current user details"""
     return success_response(current_user, "User details retrieved")
 
@@ -27,4 +28,11 @@ async def forgot_password_endpoint(request: ForgotPasswordRequest):
 @router.post("/reset-password")
 async def reset_password_endpoint(request: ResetPasswordRequest):
     """Reset user password with valid token"""
-    return await reset_password(request)
\ No newline at end of file
+    return await reset_password(request)
+
+@router.get("/metrics")
+async def metrics(current_user: dict = Depends(get_current_user_fresh)):
+    """User lookup cache statistics (admin only)"""
+    if current_user["role"] != "admin":
+        return error_response("Permission denied", 403)
+    return success_response(get_user_cache_stats(), "Auth metrics retrieved")
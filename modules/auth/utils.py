@@ -1,80 +1,208 @@
+import asyncio
 import logging
-from passlib.context import CryptContext
-from jose import JWTError, jwt
-from datetime import datetime, timedelta
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+import bcrypt
+import jwt
+from datetime import timedelta
+from cachetools import TTLCache
+import base64
+import hashlib
+import hmac
+import orjson
 import os
 import secrets
+import threading
+import time
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# argon2id tuned to roughly 100 ms per hash; bcrypt is kept only to verify legacy hashes
+password_hasher = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=1)
+_argon2_hash = password_hasher.hash
+_argon2_verify = password_hasher.verify
+_bcrypt_checkpw = bcrypt.checkpw
+
 JWT_SECRET = os.getenv("JWT_SECRET")
+if not JWT_SECRET:
+    raise RuntimeError("JWT_SECRET environment variable is not set.")
+# Encoded once rather than on every jwt.encode/jwt.decode call
+_JWT_SECRET = JWT_SECRET.encode()
 ALGORITHM = "HS256"
 
-def hash_password(password: str) -> str:
-    """Hash password using bcrypt"""
-    logger.debug("Hashing password.")
-    hashed = pwd_context.hash(password)
-    logger.debug("Password hashed successfully.")
-    return hashed
+# Verified token payloads keyed by SHA-256 of the token, so repeat requests skip jwt.decode.
+# Entries also carry their own expiry, capped at the token's exp claim.
+_TOKEN_CACHE_TTL = 30  # seconds
+_INVALID_TOKEN_TTL = 5  # seconds; briefly remember tokens that failed verification
+_token_cache = TTLCache(maxsize=10000, ttl=_TOKEN_CACHE_TTL)
+_token_cache_lock = threading.Lock()
+_MISS = object()
+
+# HMAC state with the key pads already absorbed; copied per verification instead of re-keying
+_HMAC_TEMPLATE = hmac.new(_JWT_SECRET, digestmod=hashlib.sha256)
+
+def _sign(msg: bytes) -> bytes:
+    h = _HMAC_TEMPLATE.copy()
+    h.update(msg)
+    return h.digest()
+
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+def _fast_decode(token: str):
+    """
+    Verify a plain HS256 token without going through PyJWT.
+    Returns the payload only when the token is fully valid; anything else
+    (other algorithms, bad signature, expired, malformed) returns None and
+    is left to jwt.decode so errors are reported the usual way.
+    """
+    try:
+        header_b64, payload_b64, signature_b64 = token.split(".")
+        header = orjson.loads(_b64url_decode(header_b64))
+        if header.get("alg") != ALGORITHM or "crit" in header:
+            return None
+        signing_input = token[:len(header_b64) + 1 + len(payload_b64)].encode()
+        if not hmac.compare_digest(_sign(signing_input), _b64url_decode(signature_b64)):
+            return None
+        payload = orjson.loads(_b64url_decode(payload_b64))
+    except (ValueError, AttributeError):
+        return None
+    if not isinstance(payload, dict):
+        return None
+    exp, nbf, iat = payload.get("exp"), payload.get("nbf"), payload.get("iat")
+    now = time.time()
+    if not isinstance(exp, int) or exp <= now:
+        return None
+    if nbf is not None and (not isinstance(nbf, int) or nbf > now):
+        return None
+    if iat is not None and (not isinstance(iat, int) or iat > now):
+        return None
+    return payload
+
+def _decode(token: str) -> dict:
+    return _fast_decode(token) or jwt.decode(token, _JWT_SECRET, algorithms=[ALGORITHM])
+
+def _token_cache_key(token: str):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def _token_cache_get(key):
+    with _token_cache_lock:
+        entry = _token_cache.get(key)
+    if entry is None:
+        return _MISS
+    payload, valid_until = entry
+    if time.time() >= valid_until:
+        return _MISS
+    return payload
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify password against hash"""
-    logger.debug("Verifying password.")
-    result = pwd_context.verify(plain_password, hashed_password)
-    logger.debug(f"Password verification result: {result}")
-    return result
+def _token_cache_put(key, payload):
+    now = time.time()
+    if payload is None:
+        valid_until = now + _INVALID_TOKEN_TTL
+    else:
+        valid_until = min(now + _TOKEN_CACHE_TTL, payload.get("exp", now + _TOKEN_CACHE_TTL))
+    with _token_cache_lock:
+        _token_cache[key] = (payload, valid_until)
+
+def _is_legacy_hash(hashed_password: str) -> bool:
+    return hashed_password.startswith("$2")
+
+def _verify_password_sync(plain_password: str, hashed_password: str) -> bool:
+    if _is_legacy_hash(hashed_password):
+        try:
+            return _bcrypt_checkpw(plain_password.encode(), hashed_password.encode())
+        except ValueError:
+            return False
+    try:
+        return _argon2_verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+async def hash_password(password: str) -> str:
+    """Hash password using argon2id in a worker thread"""
+    return await asyncio.to_thread(_argon2_hash, password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify password against an argon2id or legacy bcrypt hash in a worker thread"""
+    return await asyncio.to_thread(_verify_password_sync, plain_password, hashed_password)
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True for legacy bcrypt hashes or argon2 hashes with outdated parameters"""
+    return _is_legacy_hash(hashed_password) or password_hasher.check_needs_rehash(hashed_password)
 
 def create_access_token(data: dict, expires_delta: timedelta = timedelta(hours=24)):
     """Create JWT token"""
-    logger.debug(f"Creating access token for data: {data}")
     to_encode = data.copy()
-    expire = datetime.utcnow() + expires_delta
-    to_encode.update({"exp": expire})
-    token = jwt.encode(to_encode, JWT_SECRET, algorithm=ALGORITHM)
-    logger.debug(f"Access token created. Expires at: {expire}")
+    issued_at = int(time.time())
+    expire = issued_at + int(expires_delta.total_seconds())
+    to_encode.update({"iat": issued_at, "exp": expire})
+    token = jwt.encode(to_encode, _JWT_SECRET, algorithm=ALGORITHM)
+    logger.debug("Access token created. Expires at: %s", expire)
     return token
 
 def decode_token(token: str) -> dict:
     """Decode JWT token"""
-    logger.debug("Decoding JWT token.")
+    key = _token_cache_key(token)
+    cached = _token_cache_get(key)
+    if cached is not _MISS:
+        return cached
     try:
-        decoded = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
-        logger.debug(f"Token decoded successfully: {decoded}")
-        return decoded
-    except JWTError as e:
-        logger.error(f"Failed to decode token: {e}")
-        return None
+        decoded = _decode(token)
+    except jwt.PyJWTError as e:
+        logger.error("Failed to decode token: %s", e)
+        decoded = None
+    _token_cache_put(key, decoded)
+    return decoded
 
 def generate_reset_token() -> str:
     """Generate a secure random token for password reset"""
-    logger.debug("Generating password reset token.")
-    token = secrets.token_urlsafe(32)
-    logger.debug("Password reset token generated successfully.")
-    return token
+    return secrets.token_urlsafe(32)
 
-def create_reset_token_jwt(user_id: str, expires_delta: timedelta = timedelta(hours=1)) -> str:
-    """Create JWT token for password reset"""
-    logger.debug(f"Creating reset token JWT for user: {user_id}")
-    to_encode = {"sub": user_id, "type": "password_reset"}
-    expire = datetime.utcnow() + expires_delta
-    to_encode.update({"exp": expire})
-    token = jwt.encode(to_encode, JWT_SECRET, algorithm=ALGORITHM)
-    logger.debug(f"Reset token JWT created. Expires at: {expire}")
-    return token
+def hash_reset_token(token: str) -> str:
+    """SHA-256 hex digest under which a password reset token is stored"""
+    return hashlib.sha256(token.encode()).hexdigest()
 
-def verify_reset_token(token: str) -> dict:
-    """Verify and decode password reset token"""
-    logger.debug("Verifying password reset token.")
-    try:
-        decoded = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
-        if decoded.get("type") != "password_reset":
-            logger.warning("Invalid token type for password reset.")
-            return None
-        logger.debug(f"Reset token verified successfully: {decoded}")
-        return decoded
-    except JWTError as e:
-        logger.error(f"Failed to verify reset token: {e}")
-        return None
\ No newline at end of file
+class RateLimiter:
+    """
+    In-process token buckets keyed by arbitrary hashable keys. State lives in
+    this worker's memory, so each worker enforces its own limit.
+    """
+    def __init__(self, capacity: int, per_seconds: float, maxsize: int = 10000):
+        self.capacity = capacity
+        self.refill_rate = capacity / per_seconds
+        # A bucket left alone for per_seconds is full again, so evicting it then is lossless
+        self._buckets = TTLCache(maxsize=maxsize, ttl=per_seconds)
+
+    def hit(self, *keys) -> bool:
+        """Take one token from every key's bucket; False (and nothing taken) if any is empty"""
+        now = time.monotonic()
+        refilled = []
+        for key in keys:
+            tokens, last = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - last) * self.refill_rate)
+            if tokens < 1:
+                return False
+            refilled.append((key, tokens))
+        for key, tokens in refilled:
+            self._buckets[key] = (tokens - 1, now)
+        return True
+
+    def refund(self, *keys) -> None:
+        """Give back a token taken by hit(), e.g. when the attempt turned out to be legitimate"""
+        for key in keys:
+            entry = self._buckets.get(key)
+            if entry is not None:
+                tokens, last = entry
+                self._buckets[key] = (min(self.capacity, tokens + 1), last)
+
+# Failed logins allowed per minute from one client IP. The IP is request.client.host, so behind a
+# load balancer or reverse proxy uvicorn must trust its X-Forwarded-For (FORWARDED_ALLOW_IPS),
+# otherwise every client shares the proxy's address and this becomes a service-wide limit.
+LOGIN_IP_LIMIT = int(os.getenv("LOGIN_IP_LIMIT", "10"))
+# Failed logins allowed per minute for one username/email
+LOGIN_USER_LIMIT = int(os.getenv("LOGIN_USER_LIMIT", "10"))
+
+# Checked before any password hashing so floods cannot pin the CPU on the KDF
+login_ip_limiter = RateLimiter(capacity=LOGIN_IP_LIMIT, per_seconds=60)
+login_user_limiter = RateLimiter(capacity=LOGIN_USER_LIMIT, per_seconds=60)
+forgot_password_limiter = RateLimiter(capacity=3, per_seconds=3600)
@@ -1,8 +1,8 @@
+import asyncio
 import logging
 from uuid import uuid4, UUID
-from fastapi import Depends
-from datetime import datetime
 from typing import Optional, Dict
+from urllib.parse import urlencode
 from .models import EmergencySubmit, EmergencyValidate, EmergencyReject
 from .utils import (
     check_profanity,
@@ -10,50 +10,49 @@ from .utils import (
     notify_emergency_services,
     notify_citizen,
     upload_optional_media,
+    encode_cursor,
+    decode_cursor,
 )
 from fastapi import UploadFile
 from modules.shared.db import execute_query
 from modules.shared.response import success_response, error_response
-from modules.auth.manager import get_current_user
 from modules.notifications.manager import notify_broadcast, notify_user
 
 logger = logging.getLogger("emergency.manager")
 
+# Shared by both submit paths; constant SQL text lets asyncpg reuse the prepared statement
+_INSERT_EMERGENCY_SQL = """
+INSERT INTO emergency 
+(id, user_id, type, description, location_lat, location_lon, severity, 
+ image_url, voice_note_url, video_url, created_at)
+VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, NOW())
+RETURNING id, created_at
+"""
+
 def serialize_row(row):
-    """Serialize database row, converting datetime to ISO format"""
-    d = dict(row)
-    for k, v in d.items():
-        if isinstance(v, datetime):
-            d[k] = v.isoformat()
-    return d
+    """Serialize database row; datetimes are rendered as ISO 8601 by ORJSONResponse"""
+    return dict(row)
 
 async def submit_emergency(
     emergency: EmergencySubmit,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict
 ) -> dict:
     """Submit a new emergency report"""
-    logger.info(f"User {current_user['id']} is submitting an emergency: {emergency}")
+    logger.info("User %s is submitting an emergency: %s", current_user['id'], emergency)
     try:
         if check_profanity(emergency.description):
             logger.warning("Profanity detected in emergency description")
             return error_response("Emergency description contains inappropriate content", 400)
 
         emergency_id = str(uuid4())
-        logger.debug(f"Generated emergency_id: {emergency_id}")
+        logger.debug("Generated emergency_id: %s", emergency_id)
 
-        is_duplicate = await check_duplicate(current_user['id'], emergency.type, emergency.description, datetime.now())
-        logger.debug(f"Duplicate check result: {is_duplicate}")
+        is_duplicate = await check_duplicate(current_user['id'], emergency.type, emergency.description)
+        logger.debug("Duplicate check result: %s", is_duplicate)
         if is_duplicate:
             logger.warning("Duplicate emergency detected")
             return error_response("Duplicate emergency detected", 400)
 
-        query = """
-        INSERT INTO emergency 
-        (id, user_id, type, description, location_lat, location_lon, severity, 
-         image_url, voice_note_url, video_url, created_at)
-        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, NOW())
-        RETURNING id, created_at
-        """
         params = (
             emergency_id,
             current_user['id'],
@@ -66,10 +65,10 @@ async def submit_emergency(
             emergency.voice_note_url,
             emergency.video_url,
         )
-        logger.debug(f"Executing query: {query} with params: {params}")
-        result = await execute_query(query, params, commit=True, fetch_one=True)
+        logger.debug("Executing query: %s with params: %s", _INSERT_EMERGENCY_SQL, params)
+        result = await execute_query(_INSERT_EMERGENCY_SQL, params, commit=True, fetch_one=True)
 
-        logger.info(f"Emergency {emergency_id} inserted, notifying emergency services")
+        logger.info("Emergency %s inserted, notifying emergency services", emergency_id)
         
 
         # fire realtime notifications to emergency service and admin users
@@ -82,10 +81,10 @@ async def submit_emergency(
             "status": "PENDING"
         })
 
-        logger.info(f"Emergency {emergency_id} submitted successfully")
+        logger.info("Emergency %s submitted successfully", emergency_id)
         return success_response({
             "emergency_id": result[0],
-            "created_at": result[1].isoformat()
+            "created_at": result[1]
         }, "Emergency submitted successfully")
     except Exception as e:
         logger.exception("Error submitting emergency")
@@ -113,7 +112,7 @@ async def submit_emergency_with_files(
             return error_response("Emergency description contains inappropriate content", 400)
 
         emergency_id = str(uuid4())
-        is_duplicate = await check_duplicate(current_user['id'], type, description, datetime.now())
+        is_duplicate = await check_duplicate(current_user['id'], type, description)
         if is_duplicate:
             return error_response("Duplicate emergency detected", 400)
 
@@ -121,13 +120,6 @@ async def submit_emergency_with_files(
         folder = f"emergencies/{emergency_id}"
         image_url, voice_note_url, video_url = await _upload_all_media(image, voice_note, video, folder)
 
-        query = """
-        INSERT INTO emergency 
-        (id, user_id, type, description, location_lat, location_lon, severity, 
-         image_url, voice_note_url, video_url, created_at)
-        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, NOW())
-        RETURNING id, created_at
-        """
         params = (
             emergency_id,
             current_user['id'],
@@ -140,7 +132,7 @@ async def submit_emergency_with_files(
             voice_note_url,
             video_url,
         )
-        result = await execute_query(query, params, commit=True, fetch_one=True)
+        result = await execute_query(_INSERT_EMERGENCY_SQL, params, commit=True, fetch_one=True)
 
         notify_emergency_services({
             'id': emergency_id,
@@ -151,7 +143,7 @@ async def submit_emergency_with_files(
 
         return success_response({
             "emergency_id": result[0],
-            "created_at": result[1].isoformat()
+            "created_at": result[1]
         }, "Emergency submitted successfully")
     except Exception as e:
         logger.exception("Error submitting emergency with files")
@@ -165,17 +157,17 @@ async def _upload_all_media(
     folder: str,
 ):
     """Helper to upload three optional media files in parallel."""
-    from asyncio import gather
-    image_task = upload_optional_media(image, folder)
-    voice_task = upload_optional_media(voice_note, folder)
-    video_task = upload_optional_media(video, folder)
-    return await gather(image_task, voice_task, video_task)
+    return await asyncio.gather(
+        upload_optional_media(image, folder),
+        upload_optional_media(voice_note, folder),
+        upload_optional_media(video, folder),
+    )
 
-async def validate_emergency(emergency_id: str, validation: EmergencyValidate, current_user: dict = Depends(get_current_user)) -> dict:
+async def validate_emergency(emergency_id: str, validation: EmergencyValidate, current_user: dict) -> dict:
     """Validate or reject an emergency"""
-    logger.info(f"User {current_user['id']} is validating emergency {emergency_id} with status {validation.status}")
+    logger.info("User %s is validating emergency %s with status %s", current_user['id'], emergency_id, validation.status)
     if current_user['role'] not in ['emergency_service', 'admin']:
-        logger.warning(f"Unauthorized validation attempt by user {current_user['id']}")
+        logger.warning("Unauthorized validation attempt by user %s", current_user['id'])
         return error_response("Unauthorized", 403)
 
     try:
@@ -194,18 +186,18 @@ async def validate_emergency(emergency_id: str, validation: EmergencyValidate, c
             current_user['id'],
             emergency_id
         )
-        logger.debug(f"Executing query: {query} with params: {params}")
+        logger.debug("Executing query: %s with params: %s", query, params)
         result = await execute_query(query, params, commit=True, fetch_one=True)
         if not result:
-            logger.warning(f"Emergency {emergency_id} not found for validation")
+            logger.warning("Emergency %s not found for validation", emergency_id)
             return error_response("Emergency not found", 404)
 
         if validation.status == 'CANCELLED':
-            logger.info(f"Emergency {emergency_id} cancelled, notifying citizen")
+            logger.info("Emergency %s cancelled, notifying citizen", emergency_id)
             notify_citizen(emergency_id, validation.rejection_reason or "Emergency cancelled")
         # Push validation update to emergency service and admin users
         await notify_emergency_service_and_admin("emergency.updated", {"emergency_id": emergency_id, "status": validation.status})
-        logger.info(f"Emergency {emergency_id} validated successfully")
+        logger.info("Emergency %s validated successfully", emergency_id)
         return success_response({"emergency_id": result[0]}, "Emergency validated successfully")
     except Exception as e:
         logger.exception("Error validating emergency")
@@ -216,9 +208,9 @@ async def mark_action_taken(emergency_id: str, current_user: dict) -> dict:
     Mark an emergency as 'VALIDATED' (action taken).
     Only emergency_service or admin can perform this action.
     """
-    logger.info(f"User {current_user['id']} is marking emergency {emergency_id} as action taken (VALIDATED)")
+    logger.info("User %s is marking emergency %s as action taken (VALIDATED)", current_user['id'], emergency_id)
     if current_user['role'] not in ['emergency_service', 'admin']:
-        logger.warning(f"Unauthorized action taken attempt by user {current_user['id']}")
+        logger.warning("Unauthorized action taken attempt by user %s", current_user['id'])
         return error_response("Unauthorized", 403)
 
     try:
@@ -234,13 +226,13 @@ async def mark_action_taken(emergency_id: str, current_user: dict) -> dict:
             current_user['id'],
             emergency_id
         )
-        logger.debug(f"Executing query: {query} with params: {params}")
+        logger.debug("Executing query: %s with params: %s", query, params)
         result = await execute_query(query, params, commit=True, fetch_one=True)
         if not result:
-            logger.warning(f"Emergency {emergency_id} not found for action taken")
+            logger.warning("Emergency %s not found for action taken", emergency_id)
             return error_response("Emergency not found", 404)
 
-        logger.info(f"Emergency {emergency_id} marked as action taken (VALIDATED) successfully")
+        logger.info("Emergency %s marked as action taken (VALIDATED) successfully", emergency_id)
         await notify_emergency_service_and_admin("emergency.action_taken", {"emergency_id": result[0], "status": "ACTION_TAKEN"})
         return success_response({"emergency_id": result[0]}, "Emergency marked as action taken (VALIDATED) successfully")
     except Exception as e:
@@ -248,12 +240,12 @@ async def mark_action_taken(emergency_id: str, current_user: dict) -> dict:
         return error_response(str(e), 500)
 
 
-async def get_emergencies(filters: Optional[dict] = None, current_user: dict = Depends(get_current_user)) -> dict:
+async def get_emergencies(filters: Optional[dict], current_user: dict) -> dict:
     """Get emergencies with optional filters, search, and pagination"""
-    logger.info(f"User {current_user['id']} is retrieving emergencies with filters: {filters}")
+    logger.info("User %s is retrieving emergencies with filters: %s", current_user['id'], filters)
     try:
-        query = "SELECT * FROM emergency"
-        count_query = "SELECT COUNT(*) FROM emergency"
+        # COUNT(*) OVER () returns the filtered total alongside each row, saving a second query
+        query = "SELECT *, COUNT(*) OVER () AS _total FROM emergency"
         params = []
         conditions = []
         param_index = 1
@@ -273,71 +265,78 @@ async def get_emergencies(filters: Optional[dict] = None, current_user: dict = D
                 params.append(f"%{filters['search']}%")
                 param_index += 1
 
+        # Keyset pagination: rows strictly after the cursor's (created_at, id).
+        # Page-number (OFFSET) pagination is kept for existing clients but is deprecated.
+        cursor = filters.get('cursor') if filters else None
+        if cursor:
+            try:
+                cursor_created_at, cursor_id = decode_cursor(cursor)
+            except ValueError:
+                logger.warning("Invalid pagination cursor: %s", cursor)
+                return error_response("Invalid cursor", 400)
+            conditions.append(f"(created_at, id) < (${param_index}, ${param_index + 1})")
+            params.extend([cursor_created_at, cursor_id])
+            param_index += 2
+
         if conditions:
-            where_clause = ' WHERE ' + ' AND '.join(conditions)
-            query += where_clause
-            count_query += where_clause
+            query += ' WHERE ' + ' AND '.join(conditions)
 
         # Pagination
         page = int(filters.get('page', 1))
         page_size = int(filters.get('page_size', 10))
-        offset = (page - 1) * page_size
-        query += f" ORDER BY created_at DESC LIMIT {page_size} OFFSET {offset}"
+        offset = 0 if cursor else (page - 1) * page_size
+        # Bound rather than interpolated so every page reuses the same prepared statement
+        query += f" ORDER BY created_at DESC, id DESC LIMIT ${param_index} OFFSET ${param_index + 1}"
+        params.extend([page_size, offset])
 
-        logger.debug(f"Executing query: {query} with params: {params}")
+        logger.debug("Executing query: %s with params: %s", query, params)
         results = await execute_query(query, tuple(params))
-
-        # Get total count for pagination
-        total_count_result = await execute_query(count_query, tuple(params))
-        total_count = total_count_result[0][0] if total_count_result else 0
+        # With a cursor this is the number of rows remaining from the cursor onwards
+        total_count = results[0]["_total"] if results else 0
+        next_cursor = None
+        if offset + len(results) < total_count:
+            next_cursor = encode_cursor(results[-1]["created_at"], results[-1]["id"])
 
         emergencies = [serialize_row(r) for r in results]
-        logger.info(f"Retrieved {len(emergencies)} emergencies (total: {total_count})")
+        for e in emergencies:
+            e.pop("_total", None)
 
         base_url = '/api/emergencies/'
+        filter_qs = {k: filters[k] for k in ('status', 'severity', 'search') if filters.get(k)}
         next_page = None
         prev_page = None
-        if (page * page_size) < total_count:
-            next_page = f"{base_url}?page={page + 1}&page_size={page_size}"
-            if filters.get('status'):
-                next_page += f"&status={filters['status']}"
-            if filters.get('severity'):
-                next_page += f"&severity={filters['severity']}"
-            if filters.get('search'):
-                next_page += f"&search={filters['search']}"
-        if page > 1:
-            prev_page = f"{base_url}?page={page - 1}&page_size={page_size}"
-            if filters.get('status'):
-                prev_page += f"&status={filters['status']}"
-            if filters.get('severity'):
-                prev_page += f"&severity={filters['severity']}"
-            if filters.get('search'):
-                prev_page += f"&search={filters['search']}"
-
-        logger.info(f"Retrieved {len(emergencies)} emergencies (total: {total_count})")
+        if next_cursor and cursor:
+            next_page = f"{base_url}?{urlencode({'cursor': next_cursor, 'page_size': page_size, **filter_qs})}"
+        elif (page * page_size) < total_count:
+            next_page = f"{base_url}?{urlencode({'page': page + 1, 'page_size': page_size, **filter_qs})}"
+        if page > 1 and not cursor:
+            prev_page = f"{base_url}?{urlencode({'page': page - 1, 'page_size': page_size, **filter_qs})}"
+
+        logger.info("Retrieved %s emergencies (total: %s)", len(emergencies), total_count)
         return success_response({
             "emergencies": emergencies,
             "total": total_count,
             "page": page,
             "page_size": page_size,
             "next_page": next_page,
-            "prev_page": prev_page
+            "prev_page": prev_page,
+            "next_cursor": next_cursor
         }, "Emergencies retrieved successfully")
 
     except Exception as e:
         logger.exception("Error retrieving emergencies")
         return error_response(str(e), 500)
 
-async def get_emergency(filters: dict, current_user: dict = Depends(get_current_user)) -> dict:
+async def get_emergency(filters: dict, current_user: dict) -> dict:
     """Get a single emergency by ID"""
     emergency_id = filters.get("id")
-    logger.info(f"User {current_user['id']} is retrieving emergency {emergency_id}")
+    logger.info("User %s is retrieving emergency %s", current_user['id'], emergency_id)
     try:
         # Validate emergency_id is a valid UUID
         try:
             UUID(str(emergency_id))
         except ValueError:
-            logger.warning(f"Invalid emergency_id format: {emergency_id}")
+            logger.warning("Invalid emergency_id format: %s", emergency_id)
             return error_response("Invalid emergency ID format", 400)
 
         # Join with users table to get the user name and responder name
@@ -350,11 +349,11 @@ async def get_emergency(filters: dict, current_user: dict = Depends(get_current_
         """
         result = await execute_query(query, (emergency_id,), fetch_one=True)
         if not result:
-            logger.warning(f"Emergency {emergency_id} not found")
+            logger.warning("Emergency %s not found", emergency_id)
             return error_response("Emergency not found", 404)
 
         emergency = serialize_row(result)
-        logger.info(f"Emergency {emergency_id} retrieved successfully")
+        logger.info("Emergency %s retrieved successfully", emergency_id)
         return success_response(emergency, "Emergency retrieved successfully")
     except Exception as e:
         logger.exception("Error retrieving emergency")
@@ -362,48 +361,40 @@ async def get_emergency(filters: dict, current_user: dict = Depends(get_current_
 
 async def reject_emergency(emergency_id: str, rejection_reason: str, current_user: dict) -> dict:
     """Reject an emergency by ID with a given reason"""
-    logger.info(f"User {current_user['id']} is attempting to reject emergency {emergency_id} for reason: {rejection_reason}")
+    logger.info("User %s is attempting to reject emergency %s for reason: %s", current_user['id'], emergency_id, rejection_reason)
     try:
         if current_user.get("role") not in ("emergency_service", "admin"):
-            logger.warning(f"User {current_user['id']} does not have permission to reject emergencies")
+            logger.warning("User %s does not have permission to reject emergencies", current_user['id'])
             return error_response("Permission denied", 403)
 
         try:
             UUID(emergency_id)
         except ValueError:
-            logger.warning(f"Invalid emergency_id format: {emergency_id}")
+            logger.warning("Invalid emergency_id format: %s", emergency_id)
             return error_response("Invalid emergency ID format", 400)
 
-        query = "SELECT status FROM emergency WHERE id = $1"
-        result = await execute_query(query, (emergency_id,), fetch_one=True)
-        if not result:
-            logger.warning(f"Emergency {emergency_id} not found")
-            return error_response("Emergency not found", 404)
-        
+        # One round trip: the UPDATE doubles as the existence check and returns the reporter
         update_query = """
             UPDATE emergency
             SET status = 'REJECTED', rejection_reason = $2, updated_at = NOW()
             WHERE id = $1
-            RETURNING id, status, rejection_reason
+            RETURNING id, status, rejection_reason, user_id
         """
         update_result = await execute_query(update_query, (emergency_id, rejection_reason), commit=True, fetch_one=True)
         if not update_result:
-            logger.error(f"Failed to update emergency {emergency_id} to CANCELLED")
-            return error_response("Failed to reject emergency", 500)
+            logger.warning("Emergency %s not found", emergency_id)
+            return error_response("Emergency not found", 404)
 
-        logger.info(f"Emergency {emergency_id} rejected successfully")
+        logger.info("Emergency %s rejected successfully", emergency_id)
         try:
-            user_query = "SELECT user_id FROM emergency WHERE id = $1"
-            user_result = await execute_query(user_query, (emergency_id,), fetch_one=True)
-            if user_result:
-                await notify_citizen(user_result[0], f"Your emergency report was rejected: {rejection_reason}")
+            notify_citizen(update_result["user_id"], f"Your emergency report was rejected: {rejection_reason}")
         except Exception as notify_exc:
-            logger.warning(f"Failed to notify citizen for emergency {emergency_id}: {notify_exc}")
+            logger.warning("Failed to notify citizen for emergency %s: %s", emergency_id, notify_exc)
 
         return success_response({
-            "id": update_result[0],
-            "status": update_result[1],
-            "rejection_reason": update_result[2],
+            "id": update_result["id"],
+            "status": update_result["status"],
+            "rejection_reason": update_result["rejection_reason"],
         }, "Emergency rejected successfully")
     except Exception as e:
         logger.exception("Error rejecting emergency")
@@ -417,11 +408,6 @@ async def get_emergency_stats(current_user: dict) -> dict:
             WHERE status IN ('REPORTED', 'DISPATCHED', 'RESOLVED', 'CANCELLED')
             GROUP BY status
         """
-        count_results = await execute_query(count_query)
-        stats = {"REPORTED": 0, "DISPATCHED": 0, "RESOLVED": 0, "CANCELLED": 0}
-        for row in count_results:
-            stats[row[0]] = row[1]
-
         latest_query = """
             SELECT id, user_id, type, description, location_lat, location_lon, severity, status, created_at
             FROM emergency
@@ -429,21 +415,15 @@ async def get_emergency_stats(current_user: dict) -> dict:
             ORDER BY created_at DESC
             LIMIT 5
         """
-        latest_results = await execute_query(latest_query)
-        latest_reported = [
-            {
-                "id": r[0],
-                "user_id": r[1],
-                "type": r[2],
-                "description": r[3],
-                "location_lat": r[4],
-                "location_lon": r[5],
-                "severity": r[6],
-                "status": r[7],
-                "created_at": r[8].isoformat() if r[8] else None
-            }
-            for r in latest_results
-        ]
+        # Independent queries on separate pool connections; wait for the slower one only
+        count_results, latest_results = await asyncio.gather(
+            execute_query(count_query),
+            execute_query(latest_query),
+        )
+        stats = {"REPORTED": 0, "DISPATCHED": 0, "RESOLVED": 0, "CANCELLED": 0}
+        for row in count_results:
+            stats[row[0]] = row[1]
+        latest_reported = [serialize_row(r) for r in latest_results]
 
         return success_response({
             "reported": stats["REPORTED"],
@@ -56,6 +56,7 @@ async def get_all_emergencies(
     severity: str = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
+    cursor: str = Query(None, description="Keyset cursor from a previous response's next_cursor; preferred over page"),
     current_user: dict = Depends(get_current_user)
 ):
     """Get all emergencies with optional filters"""
@@ -66,6 +67,8 @@ async def get_all_emergencies(
         filters['status'] = status
     if severity:
         filters['severity'] = severity
+    if cursor:
+        filters['cursor'] = cursor
     filters['page'] = page
     filters['page_size'] = page_size
     return await get_emergencies(filters, current_user)
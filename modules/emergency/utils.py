@@ -1,8 +1,11 @@
+import base64
+import binascii
 import os
 import re
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Optional
+from uuid import UUID
 from modules.shared.db import execute_query
 
 try:
@@ -17,24 +20,47 @@ else:
 from fastapi import UploadFile
 from starlette.concurrency import run_in_threadpool
 
+# Single source of truth for the word list; the non-ASCII fallback regex is derived from it
+_PROFANITY_WORDS = frozenset(("fuck", "shit", "ass", "damn"))
+_PROFANITY_RE = re.compile(r'\b(?:' + '|'.join(map(re.escape, sorted(_PROFANITY_WORDS))) + r')\b', re.IGNORECASE)
+# Maps every ASCII non-word character to a space, so split() yields the same words \b delimits
+_ASCII_NON_WORD_TO_SPACE = {c: " " for c in range(128) if not (chr(c).isalnum() or chr(c) == "_")}
+
 def check_profanity(text: str) -> bool:
-    """Simple profanity check using regex"""
-    profanity_pattern = re.compile(r'\b(fuck|shit|ass|damn)\b', re.IGNORECASE)
-    return bool(profanity_pattern.search(text))
-
-async def check_duplicate(user_id: str, emergency_type: str, description: str, created_at: datetime) -> bool:
-    """Check for duplicate emergencies"""
-    time_window = created_at - timedelta(hours=1)
-    query = """
-    SELECT COUNT(*) 
-    FROM emergency 
-    WHERE user_id = $1 
-    AND type = $2 
-    AND description = $3
-    AND created_at >= $4
-    """
-    result = await execute_query(query, (user_id, emergency_type, description, time_window))
-    return result[0][0] > 0
+    """Simple profanity check: whole-word lookup for ASCII text, regex otherwise"""
+    if text.isascii():
+        return not _PROFANITY_WORDS.isdisjoint(text.lower().translate(_ASCII_NON_WORD_TO_SPACE).split())
+    return bool(_PROFANITY_RE.search(text))
+
+# Module-level so every call sends identical SQL text and hits the connection's prepared statement cache
+_CHECK_DUP_SQL = """
+    SELECT EXISTS (
+        SELECT 1
+        FROM emergency 
+        WHERE user_id = $1 
+        AND type = $2 
+        AND description = $3
+        AND created_at >= NOW() - INTERVAL '1 hour'
+    )
+"""
+
+async def check_duplicate(user_id: str, emergency_type: str, description: str) -> bool:
+    """Check for duplicate emergencies reported in the last hour (by the database clock)"""
+    result = await execute_query(_CHECK_DUP_SQL, (user_id, emergency_type, description), fetch_one=True)
+    return result[0]
+
+def encode_cursor(created_at: datetime, emergency_id) -> str:
+    """Opaque keyset pagination cursor for the row (created_at, id)"""
+    raw = f"{created_at.isoformat()}|{emergency_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor"""
+    try:
+        created_at, emergency_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    return datetime.fromisoformat(created_at), UUID(emergency_id)
 
 def notify_emergency_services(emergency: dict):
     """Mock emergency service notification"""
@@ -51,8 +77,13 @@ def notify_citizen(emergency_id: str, reason: str):
 
 logger = logging.getLogger("emergency.utils")
 
+_configured = False
+
 def _ensure_cloudinary_configured() -> None:
-    """Configure Cloudinary from env; raise informative error if missing."""
+    """Configure Cloudinary from env once; raise informative error if missing."""
+    global _configured
+    if _configured:
+        return
     if cloudinary is None:
         raise RuntimeError(
             f"cloudinary package not available: {cloudinary_import_error}. Install 'cloudinary' and try again."
@@ -71,6 +102,12 @@ def _ensure_cloudinary_configured() -> None:
         api_secret=api_secret,
         secure=True,
     )
+    _configured = True
+
+# Chunk size for Cloudinary upload_large; audio/video and any file above the
+# threshold are sent in chunks rather than as a single request body
+_UPLOAD_CHUNK_SIZE = 6_000_000
+_CHUNKED_UPLOAD_THRESHOLD = 5 * 1024 * 1024
 
 def _resource_type_for_mime(content_type: Optional[str]) -> str:
     if not content_type:
@@ -89,7 +126,7 @@ async def upload_media_to_cloudinary(
     """Upload a single file to Cloudinary and return the secure URL.
 
     - Auto-detects resource_type from MIME
-    - Streams upload using the underlying file object
+    - Streams upload using the underlying file object (chunked for audio/video and large files)
     - Runs the blocking uploader in a threadpool
     """
     _ensure_cloudinary_configured()
@@ -103,14 +140,18 @@ async def upload_media_to_cloudinary(
     if folder:
         upload_options["folder"] = folder
 
-    async def _do_upload():
-        return await run_in_threadpool(
-            cloudinary.uploader.upload,  # type: ignore[attr-defined]
-            file.file,
-            **upload_options,
-        )
-
-    result = await _do_upload()
+    # Rewind in case the spooled file was already read during request parsing
+    await file.seek(0)
+    if resource_type == "video" or (file.size or 0) > _CHUNKED_UPLOAD_THRESHOLD:
+        # Chunked upload streams the spooled file instead of sending it in one request body
+        uploader = cloudinary.uploader.upload_large  # type: ignore[attr-defined]
+        upload_options["chunk_size"] = _UPLOAD_CHUNK_SIZE
+        if file.filename:
+            upload_options["filename"] = file.filename
+    else:
+        uploader = cloudinary.uploader.upload  # type: ignore[attr-defined]
+
+    result = await run_in_threadpool(uploader, file.file, **upload_options)
     secure_url = result.get("secure_url") or result.get("url")
     if not secure_url:
         raise RuntimeError("Cloudinary upload did not return a URL")
@@ -1,75 +1,191 @@
+import asyncio
 import logging
-from uuid import uuid4
+import re
+import orjson
+from cachetools import TTLCache
 from fastapi import Depends, UploadFile
 from .models import IncidentSubmit, IncidentValidate
 from .utils import check_profanity, check_duplicate, notify_emergency_services, notify_citizen
-from modules.emergency.utils import upload_optional_media
-from modules.shared.db import execute_query
+from modules.emergency.utils import upload_optional_media, encode_cursor, decode_cursor
+from modules.shared.db import execute_query, get_db_connection
+from modules.shared.utils import uuid7
 from modules.shared.response import success_response, error_response
 from modules.auth.manager import get_current_user
 from typing import Optional
-from datetime import datetime
-from modules.notifications.manager import notify_broadcast, notify_emergency_service_and_admin
+from urllib.parse import urlencode
+from datetime import datetime, timezone
+from modules.notifications.manager import notify_emergency_service_and_admin
 
 logger = logging.getLogger("incidents.manager")
 
+# Canonical hyphenated UUID text; checked without allocating a uuid.UUID
+_UUID_RE = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', re.IGNORECASE)
+
+# Hot statements kept as module-level constants: identical SQL text on every call
+# lets asyncpg reuse the connection's prepared statement instead of re-parsing.
+_INSERT_INCIDENT_SQL = """
+INSERT INTO incidents 
+(id, user_id, type, description, location_lat, location_lon, image_url, voice_note_url, video_url, created_at)
+VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+RETURNING id, created_at
+"""
+
+_VALIDATE_INCIDENT_SQL = """
+UPDATE incidents 
+SET status = $1, 
+validated_at = $2,
+rejection_reason = $3 
+WHERE id = $4
+RETURNING id
+"""
+
+# Columns returned to clients; listed explicitly so internal columns such as search_tsv stay out
+_INCIDENT_COLUMNS = (
+    "id, user_id, type, description, location_lat, location_lon, "
+    "image_url, voice_note_url, video_url, status, created_at, validated_at, rejection_reason"
+)
+
+# Join with users table to get the user name
+_GET_INCIDENT_SQL = """
+SELECT i.id, i.user_id, i.type, i.description, i.location_lat, i.location_lon,
+       i.image_url, i.voice_note_url, i.video_url, i.status, i.created_at,
+       i.validated_at, i.rejection_reason, u.username as user_name
+FROM incidents i
+JOIN users u ON i.user_id = u.id
+WHERE i.id = $1
+"""
+
+# The guarded UPDATE doubles as the pending check and returns the reporter
+_REJECT_INCIDENT_SQL = """
+UPDATE incidents
+SET status = 'REJECTED', rejection_reason = $2, validated_at = NOW()
+WHERE id = $1 AND status = 'PENDING'
+RETURNING id, status, rejection_reason, validated_at, user_id
+"""
+
+# Searches shorter than this fall back to ILIKE instead of full-text matching
+_MIN_FTS_QUERY_LEN = 3
+
+_INCIDENT_EXISTS_SQL = "SELECT 1 FROM incidents WHERE id = $1"
+
+# Per-status counts plus the 5 latest pending reports; row_to_json renders created_at as ISO 8601
+_INCIDENT_STATS_SQL = """
+SELECT jsonb_build_object(
+    'counts', (
+        SELECT jsonb_object_agg(status, c)
+        FROM (
+            SELECT status, COUNT(*) AS c FROM incidents
+            WHERE status IN ('PENDING', 'REJECTED', 'VALIDATED')
+            GROUP BY status
+        ) s
+    ),
+    'latest', (
+        SELECT jsonb_agg(row_to_json(l) ORDER BY l.created_at DESC)
+        FROM (
+            SELECT id, user_id, type, description, location_lat, location_lon, status, created_at
+            FROM incidents
+            WHERE status = 'PENDING'
+            ORDER BY created_at DESC
+            LIMIT 5
+        ) l
+    )
+)
+"""
+
 def serialize_row(row):
-            d = dict(row)
-            for k, v in d.items():
-                if isinstance(v, datetime):
-                    d[k] = v.isoformat()
-            return d
+    """Serialize database row; datetimes are rendered as ISO 8601 by ORJSONResponse"""
+    return dict(row)
+
+# Dashboard stats are read far more often than incidents change; writes below invalidate the entry
+_STATS_CACHE_KEY = "incidents:stats:v1"
+_stats_cache = TTLCache(maxsize=1, ttl=15)
+
+def _invalidate_stats() -> None:
+    _stats_cache.pop(_STATS_CACHE_KEY, None)
+
+# Single-incident reads (JOIN with users) keyed by lowercased id; validate/reject evict the entry
+_incident_cache = TTLCache(maxsize=5000, ttl=60)
+
+def _invalidate_incident(incident_id) -> None:
+    _incident_cache.pop(str(incident_id).lower(), None)
+
+# Notifications run after the response is sent; tasks are referenced here until done
+_background_tasks = set()
+
+def _run_in_background(coro) -> None:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+async def drain_background_tasks() -> None:
+    """Wait for pending notification tasks; called on application shutdown"""
+    if _background_tasks:
+        await asyncio.gather(*_background_tasks, return_exceptions=True)
+
+async def _notify_incident_reported(incident_id: str, incident_type: str, location_lat, location_lon) -> None:
+    """Fan a new incident out to emergency services and realtime subscribers"""
+    try:
+        # notify_emergency_services is blocking; keep it off the event loop
+        await asyncio.to_thread(notify_emergency_services, {
+            'id': incident_id,
+            'type': incident_type,
+            'location': f"{location_lat},{location_lon}"
+        })
+        await notify_emergency_service_and_admin("incident.reported", {
+            "incident_id": incident_id,
+            "type": incident_type,
+            "location_lat": location_lat,
+            "location_lon": location_lon,
+            "status": "PENDING"
+        })
+    except Exception:
+        logger.exception("Error notifying about incident %s", incident_id)
+
+async def _notify_citizen(incident_id: str, recipient, reason: str) -> None:
+    """Run the blocking citizen notification in a worker thread"""
+    try:
+        await asyncio.to_thread(notify_citizen, recipient, reason)
+    except Exception as notify_exc:
+        logger.warning("Failed to notify citizen for incident %s: %s", incident_id, notify_exc)
+
+async def _notify_incident_updated(incident_id, status: str) -> None:
+    """Push an incident status change to emergency service and admin users"""
+    try:
+        await notify_emergency_service_and_admin("incident.updated", {"incident_id": incident_id, "status": status})
+    except Exception:
+        logger.exception("Error notifying about incident %s", incident_id)
 
 async def submit_incident(incident: IncidentSubmit, current_user: dict = Depends(get_current_user)) -> dict:
     """Submit a new incident report"""
-    logger.info(f"User {current_user['id']} is submitting an incident: {incident}")
+    logger.info("User %s is submitting an incident: %s", current_user['id'], incident)
     try:
         if check_profanity(incident.description):
             logger.warning("Profanity detected in incident description")
             return error_response("Incident description contains inappropriate content", 400)
 
-        incident_id = str(uuid4())
-        logger.debug(f"Generated incident_id: {incident_id}")
+        incident_id = str(uuid7())
+        logger.debug("Generated incident_id: %s", incident_id)
 
-        is_duplicate = await check_duplicate(current_user['id'], incident.type, incident.description, datetime.now())
-        logger.debug(f"Duplicate check result: {is_duplicate}")
+        # One timestamp per request: the duplicate window and created_at agree exactly
+        submitted_at = datetime.now(timezone.utc)
+        is_duplicate = await check_duplicate(current_user['id'], incident.type, incident.description, submitted_at)
+        logger.debug("Duplicate check result: %s", is_duplicate)
         if is_duplicate:
             logger.warning("Duplicate incident detected")
             return error_response("Duplicate incident detected", 400)
 
-        query = """
-        INSERT INTO incidents 
-        (id, user_id, type, description, location_lat, location_lon, image_url, voice_note_url, video_url, created_at)
-        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, NOW())
-        RETURNING id, created_at
-        """
-        logger.debug(f"Executing query: {query} with params: {(incident_id, current_user['id'], incident.type, incident.description, incident.location_lat, incident.location_lon, None, None, None)}")
-        result = await execute_query(
-            query,
-            (incident_id, current_user['id'], incident.type, incident.description, incident.location_lat, incident.location_lon, None, None, None),
-            commit=True,
-            fetch_one=True
-        )
+        params = (incident_id, current_user['id'], incident.type, incident.description, incident.location_lat, incident.location_lon, None, None, None, submitted_at)
+        logger.debug("Executing query: %s with params: %s", _INSERT_INCIDENT_SQL, params)
+        result = await execute_query(_INSERT_INCIDENT_SQL, params, commit=True, fetch_one=True)
+        _invalidate_stats()
 
-        logger.info(f"Incident {incident_id} inserted, notifying emergency services")
-        notify_emergency_services({
-            'id': incident_id,
-            'type': incident.type,
-            'location': f"{incident.location_lat},{incident.location_lon}"
-        })
+        logger.info("Incident %s inserted, notifying emergency services", incident_id)
+        _run_in_background(_notify_incident_reported(incident_id, incident.type, incident.location_lat, incident.location_lon))
 
-        await notify_emergency_service_and_admin("incident.reported", {
-            "incident_id": incident_id,
-            "type": incident.type,
-            "location_lat": incident.location_lat,
-            "location_lon": incident.location_lon,
-            "status": "PENDING"
-        })
-
-        logger.info(f"Incident {incident_id} submitted successfully")
+        logger.info("Incident %s submitted successfully", incident_id)
         return success_response({
             "incident_id": result[0],
-            "created_at": result[1].isoformat()
+            "created_at": result[1]
         }, "Incident submitted successfully")
     except Exception as e:
         logger.exception("Error submitting incident")
@@ -92,26 +208,20 @@ async def submit_incident_with_files(
         if check_profanity(description):
             return error_response("Incident description contains inappropriate content", 400)
 
-        incident_id = str(uuid4())
-        is_duplicate = await check_duplicate(current_user['id'], type, description, datetime.now())
+        incident_id = str(uuid7())
+        submitted_at = datetime.now(timezone.utc)
+        is_duplicate = await check_duplicate(current_user['id'], type, description, submitted_at)
         if is_duplicate:
             return error_response("Duplicate incident detected", 400)
 
         # Upload media in parallel
-        from asyncio import gather
         folder = f"incidents/{incident_id}"
-        image_url, voice_note_url, video_url = await gather(
+        image_url, voice_note_url, video_url = await asyncio.gather(
             upload_optional_media(image, folder),
             upload_optional_media(voice_note, folder),
             upload_optional_media(video, folder),
         )
 
-        query = """
-        INSERT INTO incidents 
-        (id, user_id, type, description, location_lat, location_lon, image_url, voice_note_url, video_url, created_at)
-        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, NOW())
-        RETURNING id, created_at
-        """
         params = (
             incident_id,
             current_user['id'],
@@ -122,26 +232,16 @@ async def submit_incident_with_files(
             image_url,
             voice_note_url,
             video_url,
+            submitted_at,
         )
-        result = await execute_query(query, params, commit=True, fetch_one=True)
-
-        notify_emergency_services({
-            'id': incident_id,
-            'type': type,
-            'location': f"{location_lat},{location_lon}",
-        })
+        result = await execute_query(_INSERT_INCIDENT_SQL, params, commit=True, fetch_one=True)
+        _invalidate_stats()
 
-        await notify_emergency_service_and_admin("incident.reported", {
-            "incident_id": incident_id,
-            "type": type,
-            "location_lat": location_lat,
-            "location_lon": location_lon,
-            "status": "PENDING"
-        })
+        _run_in_background(_notify_incident_reported(incident_id, type, location_lat, location_lon))
 
         return success_response({
             "incident_id": result[0],
-            "created_at": result[1].isoformat()
+            "created_at": result[1]
         }, "Incident submitted successfully")
     except Exception as e:
         logger.exception("Error submitting incident with files")
@@ -149,37 +249,31 @@ async def submit_incident_with_files(
 
 async def validate_incident(incident_id: str, validation: IncidentValidate, current_user: dict = Depends(get_current_user)) -> dict:
     """Validate or reject an incident"""
-    logger.info(f"User {current_user['id']} is validating incident {incident_id} with status {validation.status}")
+    logger.info("User %s is validating incident %s with status %s", current_user['id'], incident_id, validation.status)
     if current_user['role'] not in ['emergency_service', 'admin']:
-        logger.warning(f"Unauthorized validation attempt by user {current_user['id']}")
+        logger.warning("Unauthorized validation attempt by user %s", current_user['id'])
         return error_response("Unauthorized", 403)
 
     try:
-        query = """
-        UPDATE incidents 
-        SET status = $1, 
-        validated_at = $2,
-        rejection_reason = $3 
-        WHERE id = $4
-        RETURNING id
-        """
         params = (
             validation.status,
             datetime.now() if validation.status in ['VALIDATED', 'ACTION_TAKEN'] else None,
             validation.rejection_reason,
             incident_id
         )
-        logger.debug(f"Executing query: {query} with params: {params}")
-        result = await execute_query(query, params, commit=True, fetch_one=True)
+        logger.debug("Executing query: %s with params: %s", _VALIDATE_INCIDENT_SQL, params)
+        result = await execute_query(_VALIDATE_INCIDENT_SQL, params, commit=True, fetch_one=True)
         if not result:
-            logger.warning(f"Incident {incident_id} not found for validation")
+            logger.warning("Incident %s not found for validation", incident_id)
             return error_response("Incident not found", 404)
+        _invalidate_stats()
+        _invalidate_incident(incident_id)
 
         if validation.status == 'REJECTED':
-            logger.info(f"Incident {incident_id} rejected, notifying citizen")
-            notify_citizen(incident_id, validation.rejection_reason)
-        logger.info(f"Incident {incident_id} validated successfully")
-        await notify_emergency_service_and_admin("incident.updated", {"incident_id": result[0], "status": validation.status})
+            logger.info("Incident %s rejected, notifying citizen", incident_id)
+            _run_in_background(_notify_citizen(incident_id, incident_id, validation.rejection_reason))
+        logger.info("Incident %s validated successfully", incident_id)
+        _run_in_background(_notify_incident_updated(result[0], validation.status))
         return success_response({"incident_id": result[0]}, "Incident validated successfully")
     except Exception as e:
         logger.exception("Error validating incident")
@@ -187,10 +281,10 @@ async def validate_incident(incident_id: str, validation: IncidentValidate, curr
 
 async def get_incidents(filters: Optional[dict] = None, current_user: dict = Depends(get_current_user)) -> dict:
     """Get incidents with optional filters, search, and pagination"""
-    logger.info(f"User {current_user['id']} is retrieving incidents with filters: {filters}")
+    logger.info("User %s is retrieving incidents with filters: %s", current_user['id'], filters)
     try:
-        query = "SELECT * FROM incidents"
-        count_query = "SELECT COUNT(*) FROM incidents"
+        # COUNT(*) OVER () returns the filtered total alongside each row, saving a second query
+        query = f"SELECT {_INCIDENT_COLUMNS}, COUNT(*) OVER () AS _total FROM incidents"
         params = []
         conditions = []
         param_index = 1
@@ -200,54 +294,66 @@ async def get_incidents(filters: Optional[dict] = None, current_user: dict = Dep
                 conditions.append(f"status = ${param_index}")
                 params.append(filters['status'])
                 param_index += 1
-            if filters.get('search'):
-                conditions.append(f"(type ILIKE ${param_index} OR description ILIKE ${param_index})")
-                params.append(f"%{filters['search']}%")
+            search = filters.get('search')
+            if search:
+                if len(search.strip()) < _MIN_FTS_QUERY_LEN:
+                    # Too short to form useful tsquery lexemes; substring match via trigram indexes
+                    conditions.append(f"(type ILIKE ${param_index} OR description ILIKE ${param_index})")
+                    params.append(f"%{search}%")
+                else:
+                    conditions.append(f"search_tsv @@ plainto_tsquery('simple', ${param_index})")
+                    params.append(search)
                 param_index += 1
+        # Keyset pagination: rows strictly after the cursor's (created_at, id).
+        # Page-number (OFFSET) pagination is kept for existing clients but is deprecated.
+        cursor = filters.get('cursor') if filters else None
+        if cursor:
+            try:
+                cursor_created_at, cursor_id = decode_cursor(cursor)
+            except ValueError:
+                logger.warning("Invalid pagination cursor: %s", cursor)
+                return error_response("Invalid cursor", 400)
+            conditions.append(f"(created_at, id) < (${param_index}, ${param_index + 1})")
+            params.extend([cursor_created_at, cursor_id])
+            param_index += 2
         if conditions:
-            where_clause = ' WHERE ' + ' AND '.join(conditions)
-            query += where_clause
-            count_query += where_clause
+            query += ' WHERE ' + ' AND '.join(conditions)
         # Pagination
         page = int(filters.get('page', 1))
         page_size = int(filters.get('page_size', 10))
-        offset = (page - 1) * page_size
-        query += f" ORDER BY created_at DESC LIMIT {page_size} OFFSET {offset}"
-        logger.debug(f"Executing query: {query} with params: {params}")
+        offset = 0 if cursor else (page - 1) * page_size
+        # Bound rather than interpolated so every page reuses the same prepared statement
+        query += f" ORDER BY created_at DESC, id DESC LIMIT ${param_index} OFFSET ${param_index + 1}"
+        params.extend([page_size, offset])
+        logger.debug("Executing query: %s with params: %s", query, params)
         results = await execute_query(query, tuple(params))
-        # Get total count for pagination
-        total_count_result = await execute_query(count_query, tuple(params))
-        total_count = total_count_result[0][0] if total_count_result else 0
-        from datetime import datetime
-
-        incidents = [
-            serialize_row(r)
-            for r in results
-        ]
-        logger.info(f"Retrieved {len(incidents)} incidents (total: {total_count})")
+        # With a cursor this is the number of rows remaining from the cursor onwards
+        total_count = results[0]["_total"] if results else 0
+        next_cursor = None
+        if offset + len(results) < total_count:
+            next_cursor = encode_cursor(results[-1]["created_at"], results[-1]["id"])
+
+        incidents = [serialize_row(r) for r in results]
+        for i in incidents:
+            i.pop("_total", None)
         base_url = '/api/incidents/'
+        filter_qs = {k: filters[k] for k in ('status', 'search') if filters.get(k)}
         next_page = None
         prev_page = None
-        if (page * page_size) < total_count:
-            next_page = f"{base_url}?page={page + 1}&page_size={page_size}"
-            if filters.get('status'):
-                next_page += f"&status={filters['status']}"
-            if filters.get('search'):
-                next_page += f"&search={filters['search']}"
-        if page > 1:
-            prev_page = f"{base_url}?page={page - 1}&page_size={page_size}"
-            if filters.get('status'):
-                prev_page += f"&status={filters['status']}"
-            if filters.get('search'):
-                prev_page += f"&search={filters['search']}"
-        logger.info(f"Retrieved {len(incidents)} incidents (total: {total_count})")
+        if next_cursor and cursor:
+            next_page = f"{base_url}?{urlencode({'cursor': next_cursor, 'page_size': page_size, **filter_qs})}"
+        elif (page * page_size) < total_count:
+            next_page = f"{base_url}?{urlencode({'page': page + 1, 'page_size': page_size, **filter_qs})}"
+        if page > 1 and not cursor:
+            prev_page = f"{base_url}?{urlencode({'page': page - 1, 'page_size': page_size, **filter_qs})}"
         return success_response({
             "incidents": incidents,
             "total": total_count,
             "page": page,
             "page_size": page_size,
             "next_page": next_page,
-            "prev_page": prev_page
+            "prev_page": prev_page,
+            "next_cursor": next_cursor
         }, "Incidents retrieved successfully")
 
     except Exception as e:
@@ -257,31 +363,25 @@ async def get_incidents(filters: Optional[dict] = None, current_user: dict = Dep
 async def get_incident(filters: dict, current_user: dict = Depends(get_current_user)) -> dict:
     """Get a single incident by ID"""
     incident_id = filters.get("id")
-    logger.info(f"User {current_user['id']} is retrieving incident {incident_id}")
+    logger.info("User %s is retrieving incident %s", current_user['id'], incident_id)
     try:
         # Validate incident_id is a valid UUID
-        from uuid import UUID
-        try:
-            UUID(str(incident_id))
-        except ValueError:
-            logger.warning(f"Invalid incident_id format: {incident_id}")
+        if not _UUID_RE.fullmatch(str(incident_id)):
+            logger.warning("Invalid incident_id format: %s", incident_id)
             return error_response("Invalid incident ID format", 400)
 
-        # Join with users table to get the user name
-        query = """
-            SELECT i.*, u.username as user_name
-            FROM incidents i
-            JOIN users u ON i.user_id = u.id
-            WHERE i.id = $1
-        """
-        result = await execute_query(query, (incident_id,), fetch_one=True)
-        if not result:
-            logger.warning(f"Incident {incident_id} not found")
-            return error_response("Incident not found", 404)
-        # result is a single row, not iterable
-        incident = serialize_row(result)
-
-        logger.info(f"Incident {incident_id} retrieved successfully")
+        cache_key = incident_id.lower()
+        incident = _incident_cache.get(cache_key)
+        if incident is None:
+            result = await execute_query(_GET_INCIDENT_SQL, (incident_id,), fetch_one=True)
+            if not result:
+                logger.warning("Incident %s not found", incident_id)
+                return error_response("Incident not found", 404)
+            # result is a single row, not iterable
+            incident = serialize_row(result)
+            _incident_cache[cache_key] = incident
+
+        logger.info("Incident %s retrieved successfully", incident_id)
         return success_response(incident, "Incident retrieved successfully")
     except Exception as e:
         logger.exception("Error retrieving incident")
@@ -292,59 +392,40 @@ async def reject_incident(incident_id: str, rejection_reason: str, current_user:
     Reject an incident by ID with a given reason.
     Only emergency_service or admin users should be allowed to reject.
     """
-    logger.info(f"User {current_user['id']} is attempting to reject incident {incident_id} for reason: {rejection_reason}")
+    logger.info("User %s is attempting to reject incident %s for reason: %s", current_user['id'], incident_id, rejection_reason)
     try:
         # Check user role
         if current_user.get("role") not in ("emergency_service", "admin"):
-            logger.warning(f"User {current_user['id']} does not have permission to reject incidents")
+            logger.warning("User %s does not have permission to reject incidents", current_user['id'])
             return error_response("Permission denied", 403)
 
         # Validate incident_id is a valid UUID
-        from uuid import UUID
-        try:
-            UUID(incident_id)
-        except ValueError:
-            logger.warning(f"Invalid incident_id format: {incident_id}")
+        if not _UUID_RE.fullmatch(incident_id):
+            logger.warning("Invalid incident_id format: %s", incident_id)
             return error_response("Invalid incident ID format", 400)
 
-        # Check if incident exists and is pending
-        query = "SELECT status FROM incidents WHERE id = $1"
-        result = await execute_query(query, (incident_id,), fetch_one=True)
-        if not result:
-            logger.warning(f"Incident {incident_id} not found")
-            return error_response("Incident not found", 404)
-        if result[0] != "PENDING":
-            logger.warning(f"Incident {incident_id} is not pending and cannot be rejected")
+        # One round trip in the common case; the miss probe reuses the same connection
+        async with get_db_connection() as conn:
+            update_result = await conn.fetchrow(_REJECT_INCIDENT_SQL, incident_id, rejection_reason)
+            # Only on a miss: tell a missing incident apart from one that is no longer pending
+            exists = update_result or await conn.fetchrow(_INCIDENT_EXISTS_SQL, incident_id)
+        if not update_result:
+            if not exists:
+                logger.warning("Incident %s not found", incident_id)
+                return error_response("Incident not found", 404)
+            logger.warning("Incident %s is not pending and cannot be rejected", incident_id)
             return error_response("Only pending incidents can be rejected", 400)
 
-        # Update incident status to REJECTED and set rejection_reason
-        update_query = """
-            UPDATE incidents
-            SET status = 'REJECTED', rejection_reason = $2, validated_at = NOW()
-            WHERE id = $1
-            RETURNING id, status, rejection_reason, validated_at
-        """
-        update_result = await execute_query(update_query, (incident_id, rejection_reason), commit=True, fetch_one=True)
-        if not update_result:
-            logger.error(f"Failed to update incident {incident_id} to REJECTED")
-            return error_response("Failed to reject incident", 500)
-
-        logger.info(f"Incident {incident_id} rejected successfully")
-        # Optionally notify the citizen who reported the incident
-        try:
-            # Get user_id for notification
-            user_query = "SELECT user_id FROM incidents WHERE id = $1"
-            user_result = await execute_query(user_query, (incident_id,), fetch_one=True)
-            if user_result:
-                await notify_citizen(user_result[0], f"Your incident report was rejected: {rejection_reason}")
-        except Exception as notify_exc:
-            logger.warning(f"Failed to notify citizen for incident {incident_id}: {notify_exc}")
+        _invalidate_stats()
+        _invalidate_incident(incident_id)
+        logger.info("Incident %s rejected successfully", incident_id)
+        _run_in_background(_notify_citizen(incident_id, update_result["user_id"], f"Your incident report was rejected: {rejection_reason}"))
 
         return success_response({
             "id": update_result[0],
             "status": update_result[1],
             "rejection_reason": update_result[2],
-            "validated_at": update_result[3].isoformat() if update_result[3] else None
+            "validated_at": update_result[3]
         }, "Incident rejected successfully")
     except Exception as e:
         logger.exception("Error rejecting incident")
@@ -353,44 +434,21 @@ async def reject_incident(incident_id: str, rejection_reason: str, current_user:
 async def get_incident_stats(current_user: dict) -> dict:
     """Return stats: total pending, rejected, validated, and 5 latest pending reports"""
     try:
-        # Get counts
-        count_query = """
-            SELECT status, COUNT(*) FROM incidents
-            WHERE status IN ('PENDING', 'REJECTED', 'VALIDATED')
-            GROUP BY status
-        """
-        count_results = await execute_query(count_query)
-        stats = {"PENDING": 0, "REJECTED": 0, "VALIDATED": 0}
-        for row in count_results:
-            stats[row[0]] = row[1]
-        # Get 5 latest pending
-        latest_query = """
-            SELECT id, user_id, type, description, location_lat, location_lon, status, created_at
-            FROM incidents
-            WHERE status = 'PENDING'
-            ORDER BY created_at DESC
-            LIMIT 5
-        """
-        latest_results = await execute_query(latest_query)
-        latest_pending = [
-            {
-                "id": r[0],
-                "user_id": r[1],
-                "type": r[2],
-                "description": r[3],
-                "location_lat": r[4],
-                "location_lon": r[5],
-                "status": r[6],
-                "created_at": r[7].isoformat() if r[7] else None
+        data = _stats_cache.get(_STATS_CACHE_KEY)
+        if data is None:
+            # Counts and latest pending rows come back as one JSONB document in a single round trip
+            result = await execute_query(_INCIDENT_STATS_SQL, fetch_one=True)
+            payload = orjson.loads(result[0])
+            stats = {"PENDING": 0, "REJECTED": 0, "VALIDATED": 0}
+            stats.update(payload["counts"] or {})
+            data = {
+                "pending": stats["PENDING"],
+                "rejected": stats["REJECTED"],
+                "validated": stats["VALIDATED"],
+                "latest_pending": payload["latest"] or []
             }
-            for r in latest_results
-        ]
-        return success_response({
-            "pending": stats["PENDING"],
-            "rejected": stats["REJECTED"],
-            "validated": stats["VALIDATED"],
-            "latest_pending": latest_pending
-        }, "Incident stats retrieved successfully")
+            _stats_cache[_STATS_CACHE_KEY] = data
+        return success_response(data, "Incident stats retrieved successfully")
     except Exception as e:
         logger.exception("Error retrieving incident stats")
         return error_response(str(e), 500)
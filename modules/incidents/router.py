@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, Query, UploadFile, File, Form
 from .models import IncidentSubmit, IncidentValidate, IncidentResponse, IncidentReject
-from .manager import submit_incident, submit_incident_with_files, validate_incident, get_incidents, get_incident, reject_incident
+from .manager import submit_incident, submit_incident_with_files, validate_incident, get_incidents, get_incident, reject_incident, get_incident_stats
 from typing import Optional, Dict
 from modules.auth.manager import get_current_user
 
@@ -41,6 +41,7 @@ async def get_all_incidents(
     status: str = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
+    cursor: str = Query(None, description="Keyset cursor from a previous response's next_cursor; preferred over page"),
     current_user: dict = Depends(get_current_user)
 ):
     filters = {}
@@ -48,6 +49,8 @@ async def get_all_incidents(
         filters['search'] = search
     if status:
         filters['status'] = status
+    if cursor:
+        filters['cursor'] = cursor
     filters['page'] = page
     filters['page_size'] = page_size
     return await get_incidents(filters, current_user)
@@ -73,6 +76,5 @@ async def reject_incident_endpoint(
 
 @router.get("/stats/dashboard")
 async def get_stats(current_user: dict = Depends(get_current_user)):
-    from .manager import get_incident_stats
     return await get_incident_stats(current_user)
 
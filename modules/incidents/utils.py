@@ -1,25 +1,26 @@
-import re
 from datetime import datetime, timedelta
 from modules.shared.db import execute_query
+# Same word list as emergencies; single-pass word-set lookup built once at import
+from modules.emergency.utils import check_profanity
 
-def check_profanity(text: str) -> bool:
-    """Simple profanity check using regex"""
-    profanity_pattern = re.compile(r'\b(fuck|shit|ass|damn)\b', re.IGNORECASE)
-    return bool(profanity_pattern.search(text))
-
-async def check_duplicate(user_id: str, incident_type: str, description: str, created_at: datetime) -> bool:
-    """Check for duplicate incidents"""
-    time_window = created_at - timedelta(hours=1)
-    query = """
-    SELECT COUNT(*) 
+# md5(description) lets the (user_id, type, md5(description), created_at) index narrow to the
+# exact report; the plain description comparison only rechecks the handful of index hits
+_CHECK_DUP_SQL = """
+    SELECT 1
     FROM incidents 
     WHERE user_id = $1 
     AND type = $2 
+    AND md5(description) = md5($3)
     AND description = $3
     AND created_at >= $4
-    """
-    result = await execute_query(query, (user_id, incident_type, description, time_window))
-    return result[0][0] > 0
+    LIMIT 1
+"""
+
+async def check_duplicate(user_id: str, incident_type: str, description: str, created_at: datetime) -> bool:
+    """Check for duplicate incidents"""
+    time_window = created_at - timedelta(hours=1)
+    result = await execute_query(_CHECK_DUP_SQL, (user_id, incident_type, description, time_window), fetch_one=True)
+    return result is not None
 
 def notify_emergency_services(incident: dict):
     """Mock emergency service notification"""
@@ -1,17 +1,14 @@
 from typing import Optional, Dict, List
 from .utils import manager, topic_for_user, topic_broadcast_all
-from modules.shared.db import execute_query
+from modules.shared.db import execute_query, connect_dedicated
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 def serialize_row(row):
-            d = dict(row)
-            for k, v in d.items():
-                if isinstance(v, datetime):
-                    d[k] = v.isoformat()
-            return d
+    # Datetimes are left as-is; the orjson-backed responses encode them as ISO-8601
+    return dict(row)
 
 
 async def notify_user(user_id: str, event: str, data: Dict) -> None:
@@ -24,66 +21,129 @@ async def notify_broadcast(event: str, data: Dict) -> None:
     await manager.broadcast(topic_broadcast_all(), {"event": event, "data": data})
 
 
-async def get_users_by_role(role: str) -> List[str]:
-    """Get all user IDs for a specific role."""
+_GET_USERS_BY_ROLES_SQL = "SELECT id, role FROM users WHERE role = ANY($1::text[])"
+_ROLE_CHANNEL = "users_role_changed"
+
+# role -> user ids. Only used while the LISTEN connection is up, since that is what keeps
+# it fresh: a trigger on users NOTIFYs the affected role(s) on insert, delete or role change.
+_role_cache: Dict[str, List] = {}
+_role_cache_generation = 0
+_role_listener = None
+
+
+def _invalidate_roles(role: Optional[str] = None) -> None:
+    global _role_cache_generation
+    _role_cache_generation += 1
+    if role is None:
+        _role_cache.clear()
+    else:
+        _role_cache.pop(role, None)
+
+
+def _on_role_changed(connection, pid, channel, payload) -> None:
+    logger.debug("Role membership changed: %s", payload)
+    _invalidate_roles(payload)
+
+
+def _on_role_listener_lost(connection) -> None:
+    global _role_listener
+    logger.warning("Role change listener connection lost; role cache disabled")
+    _role_listener = None
+    _invalidate_roles()
+
+
+async def start_role_cache_listener() -> None:
+    """LISTEN for role changes on a dedicated connection; without it roles are always read from the DB"""
+    global _role_listener
     try:
-        logger.debug(f"Fetching users with role: {role}")
-        result = await execute_query(
-            "SELECT id FROM users WHERE role = $1",
-            (role,)
-        )
-        # If execute_query returns a single row, wrap in list; else, use as is
-        if result is None:
-            user_ids = []
-        elif isinstance(result, list):
-            user_ids = [row[0] for row in result]
-        else:
-            user_ids = [result[0]]
-        logger.info(f"Found {len(user_ids)} users with role '{role}'")
+        conn = await connect_dedicated()
+        await conn.add_listener(_ROLE_CHANNEL, _on_role_changed)
+        conn.add_termination_listener(_on_role_listener_lost)
+    except Exception as e:
+        logger.error("Could not start role change listener, role cache disabled: %s", e)
+        return
+    _invalidate_roles()
+    _role_listener = conn
+    logger.info("Role change listener started.")
+
+
+async def stop_role_cache_listener() -> None:
+    global _role_listener
+    conn, _role_listener = _role_listener, None
+    _invalidate_roles()
+    if conn is not None:
+        await conn.close()
+
+
+async def get_users_by_roles(roles: List[str]) -> List[str]:
+    """Get all user IDs having any of the given roles, from the role cache or in one query."""
+    try:
+        roles = list(roles)
+        by_role = {role: _role_cache[role] for role in roles if role in _role_cache}
+        missing = [role for role in roles if role not in by_role]
+        if missing:
+            generation = _role_cache_generation
+            logger.debug("Fetching users with roles: %s", missing)
+            result = await execute_query(_GET_USERS_BY_ROLES_SQL, (missing,))
+            fetched = {role: [] for role in missing}
+            for row in result:
+                fetched[row["role"]].append(row["id"])
+            by_role.update(fetched)
+            # Skip caching if a change notification arrived while the query was in flight
+            if _role_listener is not None and generation == _role_cache_generation:
+                _role_cache.update(fetched)
+        user_ids = [user_id for role in roles for user_id in by_role[role]]
+        logger.info("Found %s users with roles %s", len(user_ids), roles)
         return user_ids
     except Exception as e:
-        logger.error(f"Error getting users by role {role}: {e}")
+        logger.error("Error getting users by roles %s: %s", roles, e)
         return []
 
 
+async def get_users_by_role(role: str) -> List[str]:
+    """Get all user IDs for a specific role."""
+    return await get_users_by_roles([role])
+
+
+async def _notify_users(user_ids: List[str], event: str, data: Dict) -> None:
+    # One encode, one lock acquisition, and one concurrent send per subscribed socket
+    await manager.broadcast_many([topic_for_user(user_id) for user_id in user_ids], {"event": event, "data": data})
+
+
 async def notify_role(role: str, event: str, data: Dict) -> None:
     """Send notification to all users with a specific role."""
     user_ids = await get_users_by_role(role)
-    logger.info(f"Sending notification to role '{role}' ({len(user_ids)} users): event={event}, data={data}")
-    for user_id in user_ids:
-        await notify_user(user_id, event, data)
+    logger.info("Sending notification to role '%s' (%s users): event=%s, data=%s", role, len(user_ids), event, data)
+    await _notify_users(user_ids, event, data)
 
 
 async def notify_emergency_service_and_admin(event: str, data: Dict) -> None:
     """Send notification to all emergency service and admin users."""
-    emergency_service_users = await get_users_by_role('emergency_service')
-    admin_users = await get_users_by_role('admin')
-    
-    all_users = emergency_service_users + admin_users
-    logger.info(f"Sending notification to emergency_service and admin users ({len(all_users)} users): event={event}, data={data}")
-    for user_id in all_users:
-        await notify_user(user_id, event, data)
+    all_users = await get_users_by_roles(['emergency_service', 'admin'])
+    logger.info("Sending notification to emergency_service and admin users (%s users): event=%s, data=%s", len(all_users), event, data)
+    await _notify_users(all_users, event, data)
+
+
+_GET_USER_NOTIFICATIONS_SQL = """
+    SELECT id, user_id, alert_id, emergency_id, type, message, is_read, created_at
+    FROM notifications
+    WHERE user_id = $1
+    ORDER BY created_at DESC
+"""
 
 
-async def get_all_notifications() -> List[Dict]:
+async def get_all_notifications(user_id: str) -> List[Dict]:
     """
-    Retrieve all notifications from the database.
+    Retrieve all notifications for a user from the database.
     Returns:
         List[Dict]: A list of notification records as dictionaries.
     """
     try:
-        logger.debug("Fetching all notifications from the database")
-        result = await execute_query(
-            "SELECT id, user_id, event, data, timestamp, read FROM notifications",
-            (),
-            fetch_all=True
-        )
-        notifications = [
-                            serialize_row(r)
-                            for r in results
-                        ]
-        logger.info(f"Fetched {len(notifications)} notifications")
+        logger.debug("Fetching all notifications for user %s", user_id)
+        results = await execute_query(_GET_USER_NOTIFICATIONS_SQL, (user_id,))
+        notifications = [serialize_row(r) for r in results]
+        logger.info("Fetched %s notifications", len(notifications))
         return notifications
     except Exception as e:
-        logger.error(f"Error fetching all notifications: {e}")
+        logger.error("Error fetching all notifications: %s", e)
         return []
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Query
 from .utils import manager, topic_for_user, topic_broadcast_all
 from modules.auth.manager import get_current_user, decode_token
-from .manager import notify_emergency_service_and_admin
+from .manager import notify_emergency_service_and_admin, get_all_notifications
 import json
 import logging
 from fastapi import Depends
@@ -77,7 +77,7 @@ async def get_my_notifications(current_user=Depends(get_current_user)):
     """
     Get all notifications for the current user.
     """
-    notifications = await get_all_notifications(current_user.id)
+    notifications = await get_all_notifications(current_user["id"])
     return notifications
 
 @router.post("/send-notice")
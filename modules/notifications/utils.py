@@ -1,6 +1,13 @@
 import asyncio
+import orjson
 from typing import Dict, Set
 from fastapi import WebSocket
+from modules.shared.response import json_default
+
+
+def encode_message(message: dict) -> str:
+    """Encode a message once for fan-out; sent as a text frame, like send_json"""
+    return orjson.dumps(message, default=json_default).decode()
 
 
 class ConnectionManager:
@@ -22,16 +29,45 @@ class ConnectionManager:
                     self._topic_to_connections.pop(topic, None)
 
     async def broadcast(self, topic: str, message: dict) -> None:
-        # Copy to avoid size change during iteration
-        connections = list(self._topic_to_connections.get(topic, set()))
-        for ws in connections:
-            try:
-                await ws.send_json(message)
-            except Exception:
+        await self.broadcast_text(topic, encode_message(message))
+
+    async def broadcast_text(self, topic: str, payload: str) -> None:
+        """Send an already-encoded JSON message to every socket on a topic"""
+        # Snapshot under the lock so connect/disconnect cannot change the set mid-copy;
+        # sends happen after it is released
+        async with self._lock:
+            connections = list(self._topic_to_connections.get(topic, ()))
+        if not connections:
+            return
+        # Send to every socket concurrently so one slow client does not delay the rest
+        results = await asyncio.gather(
+            *(ws.send_text(payload) for ws in connections), return_exceptions=True
+        )
+        for ws, result in zip(connections, results):
+            if isinstance(result, BaseException):
                 # Best-effort cleanup on broken connection
                 await self.disconnect(ws, topic)
 
 
+    async def broadcast_many(self, topics, message: dict) -> None:
+        """Send one message to the union of sockets subscribed to any of the topics, once per socket"""
+        payload = encode_message(message)
+        targets: Dict[WebSocket, list] = {}
+        async with self._lock:
+            for topic in topics:
+                for ws in self._topic_to_connections.get(topic, ()):
+                    targets.setdefault(ws, []).append(topic)
+        if not targets:
+            return
+        results = await asyncio.gather(
+            *(ws.send_text(payload) for ws in targets), return_exceptions=True
+        )
+        for (ws, ws_topics), result in zip(targets.items(), results):
+            if isinstance(result, BaseException):
+                for topic in ws_topics:
+                    await self.disconnect(ws, topic)
+
+
 manager = ConnectionManager()
 
 def topic_for_user(user_id: str) -> str:
@@ -2,22 +2,20 @@ import os
 import asyncio
 from contextlib import asynccontextmanager
 
-from dotenv import load_dotenv
 import asyncpg  # Changed from psycopg2 to asyncpg
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
-)
 logger = logging.getLogger(__name__)
 
-# Load environment variables from .env file
-load_dotenv()
-
 # Database connection pool (asyncpg pool)
 db_pool = None
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "10"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "50"))
+# Idle connections above min_size are closed after this many seconds
+DB_POOL_MAX_INACTIVE_LIFETIME = float(os.getenv("DB_POOL_MAX_INACTIVE_LIFETIME", "300"))
+# Per-connection prepared statement cache (asyncpg); 0 would disable plan reuse.
+# Set it to 0 when running behind PgBouncer in transaction pooling mode.
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "1024"))
 
 async def init_db():
     """
@@ -34,15 +32,27 @@ async def init_db():
         logger.info("Initializing database connection pool...")
         db_pool = await asyncpg.create_pool(
             dsn=database_url,
-            min_size=1,
-            max_size=20,
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+            statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+            max_inactive_connection_lifetime=DB_POOL_MAX_INACTIVE_LIFETIME,
             command_timeout=60, # Optional: timeout for commands
         )
         logger.info("Database connection pool initialized successfully.")
     except Exception as e:
-        logger.exception(f"Error initializing database: {str(e)}")
+        logger.exception("Error initializing database: %s", e)
         raise
 
+async def connect_dedicated():
+    """
+    Open a standalone connection outside the pool, for long-lived uses such as LISTEN
+    that would otherwise pin a pooled connection. The caller closes it.
+    """
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise RuntimeError("DATABASE_URL environment variable is not set.")
+    return await asyncpg.connect(dsn=database_url)
+
 async def close_db():
     """
     Close the database connection pool.
@@ -61,7 +71,7 @@ async def create_tables():
     """
     try:
         schema_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')
-        logger.info(f"Reading schema from {schema_path}...")
+        logger.info("Reading schema from %s...", schema_path)
         with open(schema_path, 'r') as f:
             schema_sql = f.read()
         logger.info("Executing schema SQL to create/update tables...")
@@ -69,10 +79,10 @@ async def create_tables():
             await conn.execute(schema_sql)
             logger.info("Database tables created/updated successfully.")
     except FileNotFoundError:
-        logger.error(f"Error: schema.sql not found at {schema_path}")
+        logger.error("Error: schema.sql not found at %s", schema_path)
         raise
     except Exception as e:
-        logger.exception(f"Error creating tables: {str(e)}")
+        logger.exception("Error creating tables: %s", e)
         raise
 
 @asynccontextmanager
@@ -102,20 +112,25 @@ async def execute_query(sql, params=None, fetch_one=False, commit=False):
     """
     Execute an asynchronous SQL query and return results.
     Note: Use $1, $2, ... as placeholders in your SQL queries for parameters (not %s or %(name)s).
+    Pass the same SQL string (module-level constants) on every call so the connection's
+    prepared statement cache can reuse the parsed plan. commit is accepted for
+    compatibility; asyncpg auto-commits statements run outside a transaction.
     """
     try:
-        logger.info(f"Executing SQL query: {sql.strip().splitlines()[0][:100]}... | Params: {params}")
-        async with get_db_connection() as conn:
+        # Params are never logged: they carry password hashes, reset-token digests and FCM tokens
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Executing SQL query: %s...", sql.strip().splitlines()[0][:100])
+        if db_pool is None:
+            raise RuntimeError("Database connection pool is not initialized. Call init_db() first.")
+        async with db_pool.acquire() as conn:
             if fetch_one:
                 result = await conn.fetchrow(sql, *(params or []))
             else:
                 result = await conn.fetch(sql, *(params or []))
-            if commit and not sql.strip().upper().startswith("SELECT"):
-                logger.debug("Commit requested, but asyncpg auto-commits simple statements.")
-            logger.info("SQL query executed successfully.")
+            logger.debug("SQL query executed successfully.")
             return result
     except Exception as e:
-        logger.exception(f"Database query error: {str(e)}")
+        logger.exception("Database query error: %s", e)
         raise
 
 
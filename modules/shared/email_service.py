@@ -7,7 +7,6 @@ import os
 
 # Configure logger
 logger = logging.getLogger("email_service")
-logging.basicConfig(level=logging.INFO)
 
 class EmailService:
     def __init__(self):
@@ -1,38 +1,40 @@
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
+import orjson
 import uuid
 import decimal
-def serialize_data(obj):
-    if isinstance(obj, dict):
-        return {k: serialize_data(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [serialize_data(item) for item in obj]
-    elif isinstance(obj, uuid.UUID):
+
+def json_default(obj):
+    """orjson fallback, only reached for types it cannot encode natively"""
+    if isinstance(obj, uuid.UUID):  # asyncpg returns a uuid.UUID subclass orjson does not recognise
         return str(obj)
-    elif isinstance(obj, decimal.Decimal):
+    if isinstance(obj, decimal.Decimal):
         return float(obj)
-    else:
-        return obj
-        
+    raise TypeError
+
+class APIResponse(ORJSONResponse):
+    """ORJSONResponse that also encodes asyncpg UUIDs and Decimals inside orjson's C encoder"""
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=json_default)
 
 def success_response(data=None, message="Success"):
     """Return standardized success response"""
-    return JSONResponse(
+    return APIResponse(
         status_code=200,
         content={
             "status": "success",
             "message": message,
-            "data": serialize_data(data)
+            "data": data
         }
     )
 
 def error_response(message, status_code=400):
     """Return standardized error response"""
-    return JSONResponse(
+    return APIResponse(
         status_code=status_code,
         content={
             "status": "error",
             "message": message,
             "data": None
         }
-    )
\ No newline at end of file
+    )
@@ -1,13 +1,42 @@
 from .db import get_db_connection
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_EMAIL_LOWER_INDEX_EXISTS_SQL = "SELECT to_regclass('users_email_lower_uniq') IS NOT NULL"
+_EMAIL_CASE_CONFLICTS_SQL = """
+    SELECT lower(email) AS email, COUNT(*) AS accounts
+    FROM users
+    GROUP BY lower(email)
+    HAVING COUNT(*) > 1
+    ORDER BY lower(email)
+    LIMIT 20
+"""
+_CREATE_EMAIL_LOWER_INDEX_SQL = "CREATE UNIQUE INDEX users_email_lower_uniq ON users (lower(email))"
+
+async def _create_email_lower_index(conn):
+    """
+    Case-insensitive email uniqueness (also serves login lookups). Databases created before
+    this index may hold emails differing only in case, which would fail the build with an
+    opaque unique violation, so those are reported by address instead.
+    """
+    if await conn.fetchval(_EMAIL_LOWER_INDEX_EXISTS_SQL):
+        return
+    conflicts = await conn.fetch(_EMAIL_CASE_CONFLICTS_SQL)
+    if conflicts:
+        listed = ", ".join(f"{r['email']} ({r['accounts']} accounts)" for r in conflicts)
+        raise RuntimeError(
+            "Cannot create users_email_lower_uniq: these emails are registered more than once "
+            f"with different letter case: {listed}. Merge or rename the duplicate accounts, then restart."
+        )
+    await conn.execute(_CREATE_EMAIL_LOWER_INDEX_SQL)
+
 async def create_tables():
     """Create tables for the Citizen Safety Application"""
     schema_sql = """
+        -- gen_random_uuid() for databases older than PostgreSQL 13
+        CREATE EXTENSION IF NOT EXISTS pgcrypto;
+
         -- Users table: Stores user information
         CREATE TABLE IF NOT EXISTS users (
             id UUID PRIMARY KEY,
@@ -90,6 +119,65 @@ async def create_tables():
         CREATE INDEX IF NOT EXISTS idx_emergency_user_id ON emergency (user_id);
         CREATE INDEX IF NOT EXISTS idx_emergency_status ON emergency (status);
 
+        -- Password reset token lookups
+        CREATE INDEX IF NOT EXISTS idx_password_reset_tokens_token ON password_reset_tokens (token);
+
+        -- Users: role lookups for staff notifications; role changes invalidate the in-process role cache
+        CREATE INDEX IF NOT EXISTS idx_users_role ON users (role);
+        CREATE OR REPLACE FUNCTION notify_users_role_changed() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM pg_notify('users_role_changed', NEW.role);
+            ELSIF TG_OP = 'DELETE' THEN
+                PERFORM pg_notify('users_role_changed', OLD.role);
+            ELSIF NEW.role IS DISTINCT FROM OLD.role THEN
+                PERFORM pg_notify('users_role_changed', OLD.role);
+                PERFORM pg_notify('users_role_changed', NEW.role);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        DROP TRIGGER IF EXISTS users_role_changed ON users;
+        CREATE TRIGGER users_role_changed AFTER INSERT OR DELETE OR UPDATE OF role ON users
+            FOR EACH ROW EXECUTE FUNCTION notify_users_role_changed();
+
+        -- Alerts: active-alert listing and type/message search
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS idx_alerts_active_created ON alerts (created_at DESC) WHERE status = 'ACTIVE';
+        CREATE INDEX IF NOT EXISTS idx_alerts_type_trgm ON alerts USING gin (type gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS idx_alerts_message_trgm ON alerts USING gin (message gin_trgm_ops);
+
+        -- Emergency: newest-first listing, optionally filtered by status or severity
+        CREATE INDEX IF NOT EXISTS idx_emergency_created_at ON emergency (created_at DESC);
+        CREATE INDEX IF NOT EXISTS idx_emergency_status_created_at ON emergency (status, created_at DESC);
+        CREATE INDEX IF NOT EXISTS idx_emergency_severity_created_at ON emergency (severity, created_at DESC);
+
+        -- Emergency: newest pending emergencies first (partial index on a status the CHECK constraint allows)
+        CREATE INDEX IF NOT EXISTS idx_emergency_pending_recent ON emergency (created_at DESC) WHERE status = 'PENDING';
+
+        -- Emergency: duplicate-submission check
+        CREATE INDEX IF NOT EXISTS idx_emergency_dup_check ON emergency (user_id, type, created_at);
+
+        -- Emergency: type/description ILIKE search
+        CREATE INDEX IF NOT EXISTS idx_emergency_type_trgm ON emergency USING gin (type gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS idx_emergency_description_trgm ON emergency USING gin (description gin_trgm_ops);
+
+        -- Incidents: newest-first listing, optionally filtered by status; id makes the keyset order total
+        CREATE INDEX IF NOT EXISTS idx_incidents_created_at_id ON incidents (created_at DESC, id DESC);
+        CREATE INDEX IF NOT EXISTS idx_incidents_status_created_at_id ON incidents (status, created_at DESC, id DESC);
+
+        -- Incidents: duplicate-submission check (md5 keeps long descriptions out of the index)
+        CREATE INDEX IF NOT EXISTS idx_incidents_dup_check ON incidents (user_id, type, md5(description), created_at DESC);
+
+        -- Incidents: type/description ILIKE search
+        CREATE INDEX IF NOT EXISTS idx_incidents_type_trgm ON incidents USING gin (type gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS idx_incidents_description_trgm ON incidents USING gin (description gin_trgm_ops);
+
+        -- Incidents: full-text search (trigram indexes above serve the short-query ILIKE fallback)
+        ALTER TABLE incidents ADD COLUMN IF NOT EXISTS search_tsv tsvector
+            GENERATED ALWAYS AS (to_tsvector('simple', coalesce(type, '') || ' ' || coalesce(description, ''))) STORED;
+        CREATE INDEX IF NOT EXISTS idx_incidents_search_tsv ON incidents USING gin (search_tsv);
+
         -- Notification table: Stores notifications sent to users about alerts and emergencies
         CREATE TABLE IF NOT EXISTS notifications (
             id UUID PRIMARY KEY,
@@ -112,6 +200,7 @@ async def create_tables():
         async with get_db_connection() as conn:
             async with conn.transaction():
                 await conn.execute(schema_sql)
+                await _create_email_lower_index(conn)
                 logger.info("Database tables and indexes created successfully.")
     except Exception as e:
         logger.error(f"Error creating tables: {str(e)}")
@@ -1,4 +1,21 @@
 import logging
+import os
+import time
+import uuid
+
+def uuid7() -> uuid.UUID:
+    """
+    Time-ordered UUID (RFC 9562 version 7): 48-bit Unix milliseconds followed by
+    random bits, so new primary keys land at the right edge of the B-tree.
+    """
+    ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    value = (ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76                       # version
+    value |= (rand >> 62 & 0xFFF) << 64      # rand_a (12 bits)
+    value |= 0b10 << 62                      # RFC 4122 variant
+    value |= rand & 0x3FFF_FFFF_FFFF_FFFF    # rand_b (62 bits)
+    return uuid.UUID(int=value)
 
 async def get_all_locations():
     """